@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Optional, Tuple, TYPE_CHECKING
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np # type: ignore
 
 import colors
 import exceptions
@@ -20,16 +22,12 @@ def check_turn_advance(engine: Engine, entity: Actor):
         engine.current_turn += 1
         
     remove_summons = []
-    for npc in engine.game_map.actors:
-        npc_buffs = list(npc.battler.current_buffs)
-        for buff in npc_buffs:
-            buff_turn = npc.battler.current_buffs[buff][0]
-            if buff_turn < engine.current_turn:
-                if buff == "Player Summoned":
-                    remove_summons.append(npc)
-                else:
-                    engine.message_log.add_message(f"{npc.name}'s {buff} fades.", colors.red)
-                    del npc.battler.current_buffs[buff]
+    for npc, buff in engine.timed_effects.pop_due(engine.current_turn, engine.game_map):
+        if buff == "Player Summoned":
+            remove_summons.append(npc)
+        else:
+            engine.message_log.add_message(f"{npc.name}'s {buff} fades.", colors.red)
+            del npc.battler.current_buffs[buff]
 
     for removes in remove_summons:
         engine.message_log.add_message(f"{removes.name} vanishes in a puff of smoke.", colors.red)
@@ -138,8 +136,8 @@ class PickupAction(Action):
         actor_location_y = self.entity.y
         inventory = self.entity.inventory
 
-        for item in self.engine.game_map.items:
-            if actor_location_x == item.x and actor_location_y == item.y:
+        for item in list(self.engine.game_map.get_entities_at_location(actor_location_x, actor_location_y)):
+            if isinstance(item, Item):
                 if item.can_stack == True:
                     for i in range(len(self.entity.inventory.items)):
                         if item.name == self.entity.inventory.items[i].name:
@@ -543,8 +541,8 @@ class TakeStairsAction(Action):
         Take the stairs, if any exist at the entity's location.
         """
         stairs_found = False
-        for entity in self.engine.game_map.entities:
-            if (entity.stairs and self.entity.x == entity.x and self.entity.y == entity.y):
+        for entity in self.engine.game_map.get_entities_at_location(self.entity.x, self.entity.y):
+            if entity.stairs:
                 stairs_found = True
                 found_stairs = entity
         if stairs_found == True:
@@ -762,6 +760,7 @@ class CastSelfBuffAction(Action):
                 self.entity.battler.current_buffs[self.buff_spell] = [self.engine.current_turn + caster_level * 10, 0]
             elif self.buff_spell in ("Alter Self"):
                 self.entity.battler.current_buffs[self.buff_spell] = [self.engine.current_turn + caster_level * 10 * 10, 0]
+            self.engine.timed_effects.schedule(self.entity, self.buff_spell)
         else:
             raise exceptions.Impossible("That is not a buff spell: error.")
 
@@ -976,6 +975,7 @@ class CastRayOfEnfeeblementAction(Action):
                     f"{attack_desc} lowering str by {str_damage}.", attack_color
                 )
                 target.battler.current_buffs["Ray of Enfeeblement"] = [self.engine.current_turn + 10 * self.entity.level.current_level, str_damage]
+                self.engine.timed_effects.schedule(target, "Ray of Enfeeblement")
             else:
                 self.engine.message_log.add_message(
                     f"{attack_desc} but does no damage.", attack_color
@@ -1139,8 +1139,8 @@ class MovementAction(ActionWithDirection):
             # Destination is blocked by a tile.
             raise exceptions.Impossible("That way is blocked.")
 
-        for gold in self.engine.game_map.gold_piles:
-            if dest_x == gold.x and dest_y == gold.y:
+        for gold in list(self.engine.game_map.get_entities_at_location(dest_x, dest_y)):
+            if isinstance(gold, Gold):
                 self.engine.message_log.add_message(f"{self.entity.name} picks up {gold.number} gold pieces.")
                 self.entity.battler.gold += gold.number
                 self.engine.game_map.entities.remove(gold)
@@ -1150,12 +1150,11 @@ class MovementAction(ActionWithDirection):
         if self.entity == self.engine.player:
             log_items = True
             ground_message = ""
-            for item_maybe in self.engine.game_map.entities:
-                if dest_x == item_maybe.x and dest_y == item_maybe.y:
-                    if item_maybe.blocks_movement == True:
-                        log_items = False
-                    else:
-                        ground_message = ground_message + f"{item_maybe.name} is here.\n"
+            for item_maybe in self.engine.game_map.get_entities_at_location(dest_x, dest_y):
+                if item_maybe.blocks_movement == True:
+                    log_items = False
+                else:
+                    ground_message = ground_message + f"{item_maybe.name} is here.\n"
             if log_items == True and len(ground_message) > 0:
                 self.engine.message_log.add_message(ground_message)
 
@@ -1178,95 +1177,109 @@ class LongRestAction(Action):
         self.duration = duration
 
     def perform(self) -> None:
+        """
+        Rest until full hp/mana (at most 500 turns), or for duration turns.
+
+        Monsters don't act and the player doesn't move while resting, so what is in view
+        can't change.  It is checked once, then the turns are skipped in jumps that only
+        stop where a buff or summon expires.
+        """
         player = self.entity
-        enemy_spotted = "Derp?"
-        rest_check = False
-        max_rest = 0
-        if self.duration == 0: #Rest until full hps/mana
-            while rest_check == False and max_rest < 500: #increase with slower regen
-                for enemy in self.engine.game_map.actors:
-                    if enemy == self.engine.player:
-                        continue
-                    if self.engine.game_map.visible[enemy.x][enemy.y] == True:
-                        rest_check = True
-                        enemy_spotted = enemy
-                if rest_check == True:
-                    raise exceptions.Impossible(f"{enemy_spotted.name} spotted.")
-                    break
-                else:
-                    check_turn_advance(self.engine, self.entity) #need better regen plan
-                    player.battler.hp = min(player.battler.hp + 1, player.battler.max_hp)
-                    player.battler.mana = min(player.battler.mana + 1, player.battler.max_mana)
-                    max_rest += 1
-                    self.engine.update_fov()
-                if player.battler.hp >= player.battler.max_hp and player.battler.mana >= player.battler.max_mana:
-                    rest_check = True
-                    self.engine.message_log.add_message(f"{player.name} is fully rested.", colors.white)
-        else: #Fixed number of turns
-            while rest_check == False and max_rest < self.duration:
-                for enemy in self.engine.game_map.actors:
-                    if enemy == self.engine.player:
-                        continue
-                    if self.engine.game_map.visible[enemy.x][enemy.y] == True:
-                        rest_check = True
-                        enemy_spotted = enemy
-                if rest_check == True:
-                    raise exceptions.Impossible(f"{enemy_spotted.name} spotted.")
-                    break
-                else:
-                    check_turn_advance(self.engine, self.entity) #need better regen plan
-                    player.battler.hp = min(player.battler.hp + 1, player.battler.max_hp)
-                    player.battler.mana = min(player.battler.mana + 1, player.battler.max_mana)
-                    max_rest += 1
-                    self.engine.update_fov()
+        for enemy in self.engine.game_map.actors:
+            if enemy == self.engine.player:
+                continue
+            if self.engine.game_map.visible[enemy.x][enemy.y] == True:
+                raise exceptions.Impossible(f"{enemy.name} spotted.")
+
+        max_rest = self.duration if self.duration else 500 #increase with slower regen
+        rested = 0
+        while rested < max_rest:
+            if self.duration:
+                turns = max_rest - rested
+            else: #Rest until full hps/mana
+                turns = min(max_rest - rested, max(1, player.battler.max_hp - player.battler.hp,
+                                                   player.battler.max_mana - player.battler.mana))
+            next_expiry = self.engine.timed_effects.next_expiry(self.engine.game_map)
+            if next_expiry is not None: # Stop on the turn it expires, it may change max hp/mana
+                turns = min(turns, max(1, next_expiry + 1 - self.engine.current_turn))
+            self.engine.current_turn += turns - 1
+            check_turn_advance(self.engine, self.entity) # Last turn of the jump #need better regen plan
+            player.battler.hp = min(player.battler.hp + turns, player.battler.max_hp)
+            player.battler.mana = min(player.battler.mana + turns, player.battler.max_mana)
+            rested += turns
+            if not self.duration and player.battler.hp >= player.battler.max_hp and player.battler.mana >= player.battler.max_mana:
+                self.engine.message_log.add_message(f"{player.name} is fully rested.", colors.white)
+                break
+        if self.duration:
             self.engine.message_log.add_message(f"{player.name} stops resting.", colors.white)
+        self.engine.update_fov()
             
 
 class FastMoveAction(ActionWithDirection):
-    def perform(self) -> None:
-        dest_x, dest_y = self.dest_xy
-        movecheck = False
-        max_moves = 1
-        enemy_spotted = "Derp?"
-        while movecheck == False and max_moves < 100:
-            for enemy in self.engine.game_map.actors:
-                if enemy == self.engine.player:
-                    continue
-                if self.engine.game_map.visible[enemy.x][enemy.y] == True:
-                    movecheck = True
-                    enemy_spotted = enemy
-            destin_x = self.engine.player.x + self.dx
-            destin_y = self.engine.player.y + self.dy
-            if not self.engine.game_map.in_bounds(destin_x, destin_y):
+    """
+    Run in a direction, at most 99 steps, until something comes into view or there are items underfoot.
+
+    Monsters don't act during the run, so the path is worked out before moving.  After
+    each step only the cells that came into view are searched for actors, and only the
+    cell stepped on for items.
+    """
+
+    def run_path(self) -> Tuple[List[Tuple[int, int]], Optional[str]]:
+        """
+        Return the cells the run crosses and why it stops after them.
+
+        The reason is None for a wall or the step limit, otherwise the message for the
+        step that is blocked.
+        """
+        game_map = self.engine.game_map
+        x, y = self.entity.x, self.entity.y
+        path = []
+        while len(path) < 99:
+            x, y = x + self.dx, y + self.dy
+            if not game_map.in_bounds(x, y):
                 # Destination is out of bounds.
-                raise exceptions.Impossible("That way is blocked. (out of map)")
-                break
-            if not self.engine.game_map.tiles["walkable"][destin_x, destin_y]:
+                return path, "That way is blocked. (out of map)"
+            if not game_map.tiles["walkable"][x, y]:
                 # Destination is blocked by a tile.
-                break
-                raise exceptions.Impossible("That way is blocked. (tile)")
-            if self.engine.game_map.get_blocking_entity_at_location(destin_x, destin_y):
+                return path, None
+            if game_map.get_blocking_entity_at_location(x, y):
                 # Destination is blocked by a blocking entity.
-                raise exceptions.Impossible("That way is blocked. (entity)")
-                break
+                return path, "That way is blocked. (entity)"
+            path.append((x, y))
+        return path, None
+
+    def newly_spotted_actor(self) -> Optional[Actor]:
+        """Return an actor in the cells that came into view with the last FOV update."""
+        for x, y in zip(*np.nonzero(self.engine.newly_visible)):
+            actor = self.engine.game_map.get_actor_at_location(int(x), int(y))
+            if actor and actor is not self.engine.player:
+                return actor
+        return None
 
+    def perform(self) -> None:
+        for enemy in self.engine.game_map.actors:
+            if enemy == self.engine.player:
+                continue
+            if self.engine.game_map.visible[enemy.x][enemy.y] == True:
+                raise exceptions.Impossible(f"{enemy.name} spotted.")
+
+        path, blocked_reason = self.run_path()
+        for x, y in path:
+            ground_message = ""
             if self.entity == self.engine.player:
-                log_items = True
-                ground_message = ""
-                for item_maybe in self.engine.game_map.entities:
-                    if destin_x == item_maybe.x and destin_y == item_maybe.y:
-                        if item_maybe.blocks_movement == True:
-                            log_items = False
-                        else:
-                            ground_message = ground_message + f"{item_maybe.name} is here.\n"
-                if log_items == True and len(ground_message) > 0:
+                for item_maybe in self.engine.game_map.get_entities_at_location(x, y):
+                    ground_message = ground_message + f"{item_maybe.name} is here.\n"
+                if len(ground_message) > 0:
                     self.engine.message_log.add_message(ground_message)
 
-            if movecheck == True:
+            check_turn_advance(self.engine, self.entity)
+            self.entity.move(self.dx, self.dy)
+            self.engine.update_fov()
+
+            enemy_spotted = self.newly_spotted_actor()
+            if enemy_spotted:
                 raise exceptions.Impossible(f"{enemy_spotted.name} spotted.")
-                break
-            else:
-                check_turn_advance(self.engine, self.entity)
-                self.entity.move(self.dx, self.dy)
-                max_moves += 1
-                self.engine.update_fov()
+            if ground_message:
+                return None # Stop on items
+        if blocked_reason:
+            raise exceptions.Impossible(blocked_reason)
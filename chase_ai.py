@@ -0,0 +1,26 @@
+"""
+The AIs of components.ai that chase the player, finding their way down the distances to
+the player the map shares between them instead of each searching for a path.
+"""
+from typing import List, Tuple
+
+from components import ai
+
+class PathToPlayer:
+    """Mixin for BaseAI subclasses, answers get_path_to the player from GameMap.path_to_player."""
+
+    def get_path_to(self, dest_x: int, dest_y: int) -> List[Tuple[int, int]]:
+        game_map = self.entity.gamemap
+        player = game_map.engine.player
+        if (dest_x, dest_y) == (player.x, player.y):
+            return game_map.path_to_player(self.entity.x, self.entity.y)
+        return super().get_path_to(dest_x, dest_y)
+
+class HostileEnemy(PathToPlayer, ai.HostileEnemy):
+    pass
+
+class RangedEnemy(PathToPlayer, ai.RangedEnemy):
+    pass
+
+class DragonEnemy(PathToPlayer, ai.DragonEnemy):
+    pass
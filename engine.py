@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 
 from tcod.console import Console
 from tcod.map import compute_fov
@@ -8,7 +8,9 @@ import pygame
 
 import exceptions
 import message_log
-from render_functions import render_bar, render_names_at_mouse_location
+import presentation
+from timed_effects import TimedEffects
+from render_functions import PygameRenderer, Renderer
 from loader_functions.initialize_new_game import get_constants
 
 if TYPE_CHECKING:
@@ -22,7 +24,8 @@ class Engine:
     game_map: GameMap
     game_world: GameWorld
     
-    def __init__(self, player: Actor):
+    def __init__(self, player: Actor, renderer: Optional[Renderer] = None):
+        """renderer defaults to drawing with pygame, pass Renderer() to run with no display."""
         self.message_log = message_log.MessageLog()
         self.mouse_location = (0, 0)
         self.target_location = (0, 0)
@@ -35,9 +38,14 @@ class Engine:
         self.last_target = player
         self.last_level: int = 0
         self.current_turn: int = 0
+        self.fov_radius: int = 12
+        self.fov_key = None # (game_map, position, radius, tiles_version) of the current FOV
+        self.newly_visible = None # Cells that came into view on the last FOV change
+        self.renderer = renderer if renderer is not None else PygameRenderer()
+        self.timed_effects = TimedEffects() # Buff and summon expiry, checked by check_turn_advance
 
     def handle_enemy_turns(self) -> None:
-        for entity in set(self.game_map.actors) - {self.player}:
+        for entity in self.game_map.live_actors - {self.player}:
             if entity.ai:
                 try:
                     entity.ai.perform()
@@ -45,23 +53,30 @@ class Engine:
                     pass # Ignore impossible action exceptions from AI.
 
     def update_fov(self) -> None:
-        """Recompute the visible area based on the players point of view."""
-        self.game_map.visible[:] = compute_fov(
-            self.game_map.tiles["transparent"],
+        """
+        Recompute the visible area based on the players point of view.
+
+        Skipped while the map, player position, radius and map tiles are unchanged, so
+        calling it every frame or every turn of a rest is cheap.
+        """
+        game_map = self.game_map
+        fov_key = (game_map, (self.player.x, self.player.y), self.fov_radius, game_map.tiles_version)
+        if fov_key == self.fov_key:
+            return
+        self.fov_key = fov_key
+
+        visible = compute_fov(
+            game_map.tiles["transparent"],
             (self.player.x, self.player.y),
-            radius = 12,
+            radius = self.fov_radius,
         )
+        self.newly_visible = visible & ~game_map.visible
+        game_map.visible[:] = visible
         # If a tile is "visible" it should be added to "explored".
-        self.game_map.explored |= self.game_map.visible
+        game_map.explored |= self.newly_visible
 
     def render(self, screen: pygame.display) -> None:
-        self.game_map.render(screen)
-
-        self.message_log.render_messages(screen = screen, x = 40, y = 44, width = 40, height = 5, messages = self.message_log.messages)
-
-        render_bar(main_screen = screen, engine = self)
-
-        render_names_at_mouse_location(screen = screen, x = 25, y = constants['screen_height'] - constants['message_height'] - 1, engine = self)
+        self.renderer.render(self, screen)
 
     def render_target_square(self, screen: pygame.display, mouse_target: bool = False) -> None:
         if mouse_target == True:
@@ -72,9 +87,8 @@ class Engine:
         square_image.fill((255, 255, 255))
         pygame.draw.rect(square_image, (255, 0, 0), pygame.Rect(0, 0, 16, 16), 2)
         square_image.set_colorkey((255, 255, 255))
-        pygame.display.update()
         if self.game_map.in_bounds(x, y):
-            screen.blit(square_image, (x*block_size, y*block_size))
+            presentation.mark_overlay(screen.blit(square_image, (x*block_size, y*block_size)))
 
     def render_target_cone(self, screen: pygame.display, mouse_target: bool = False, radius: int = 3) -> None:
         if mouse_target == True:
@@ -119,5 +133,4 @@ class Engine:
             pygame.draw.polygon(cone_image, (255, 0, 0), [(int(radius*block_size/2), radius*block_size), (radius*block_size, 0), (0, 0)], 2)
         else: # target on player
             pass
-        screen.blit(cone_image, ((player.x + x_offset)*block_size, (player.y + y_offset)*block_size))
-        pygame.display.update()
+        presentation.mark_overlay(screen.blit(cone_image, ((player.x + x_offset)*block_size, (player.y + y_offset)*block_size)))
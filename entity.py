@@ -13,6 +13,8 @@ from loader_functions.random_utils import random_choice_from_cr, get_inv
 import tile_types
 import colors
 import random
+import prototypes
+import sprites
 
 if TYPE_CHECKING:
     from components.ai import BaseAI
@@ -24,6 +26,37 @@ if TYPE_CHECKING:
 
 T = TypeVar("T", bound = "Entity")
 
+# Attribute names of the Equipment slots.
+EQUIPMENT_SLOTS = ("main_hand", "off_hand", "ranged", "body", "neck", "waist", "lring", "rring",
+                   "head", "cloak", "eyes", "shirt", "wrists", "feet", "hands", "misc")
+
+def copy_component(component, parent, owner_attr: str = "parent"):
+    """Shallow copy a component for parent, with its own copy of any list, dict or set it holds."""
+    clone = copy.copy(component)
+    for name, value in vars(component).items():
+        if isinstance(value, (list, dict, set)):
+            setattr(clone, name, copy.copy(value))
+    setattr(clone, owner_attr, parent)
+    return clone
+
+def clone_equipment(equipment: Equipment, owner: Actor, cloned_items: dict) -> Equipment:
+    """
+    Copy an Equipment for owner, cloning each worn item.
+
+    cloned_items maps prototype items to their clones, so an item that is both worn and
+    carried stays a single object.
+    """
+    clone = copy.copy(equipment)
+    clone.parent = owner
+    for slot in EQUIPMENT_SLOTS:
+        item = getattr(equipment, slot, None)
+        if item is not None:
+            if item not in cloned_items:
+                cloned_items[item] = item.clone()
+                cloned_items[item].parent = clone
+            setattr(clone, slot, cloned_items[item])
+    return clone
+
 class Entity:
     """
     A generic object to represent players, enemies, items, etc.
@@ -31,6 +64,7 @@ class Entity:
     """
 
     parent: Union[Gamemap, Inventory]
+    prototype_id: Optional[str] = None # Name in entity_factories of the prototype this was copied from
     
     def __init__(
         self,
@@ -78,6 +112,38 @@ class Entity:
     def gamemap(self) -> GameMap:
         return self.parent.gamemap
 
+    @property
+    def blocks_movement(self) -> bool:
+        return self._blocks_movement
+
+    @blocks_movement.setter
+    def blocks_movement(self, blocks_movement: bool) -> None:
+        self._blocks_movement = blocks_movement
+        self.update_location_index()
+
+    def update_location_index(self) -> None:
+        """Refile this entity in the location index of the GameMap holding it, if any."""
+        parent = self.__dict__.get("parent")
+        if parent is not None and self in getattr(parent, "entity_keys", ()):
+            parent.update_entity_location(self)
+
+    # Entities hold a shared sprite handle, graphic and graphic_pos read and swap it.
+    @property
+    def graphic(self) -> str:
+        return self.sprite.graphic
+
+    @graphic.setter
+    def graphic(self, graphic: str) -> None:
+        self.sprite = sprites.get_sprite(graphic, getattr(self, "graphic_pos", (0, 0)))
+
+    @property
+    def graphic_pos(self) -> Tuple[int, int]:
+        return self.sprite.graphic_pos
+
+    @graphic_pos.setter
+    def graphic_pos(self, graphic_pos: Tuple[int, int]) -> None:
+        self.sprite = sprites.get_sprite(self.graphic, graphic_pos)
+
     @property
     def base_gold(self) -> int:
         base_gold_by_cr = {0.125: 15, 0.2: 20, 0.25: 25, 0.4: 33, 0.5: 50,
@@ -90,9 +156,21 @@ class Entity:
                            28: 100000, 29: 100000, 30: 100000}
         return base_gold_by_cr[self.battler.cr]
 
+    def clone(self: T) -> T:
+        """
+        Return a new instance of this prototype.
+
+        Data that doesn't change during play (name, graphics, dice, base stats, feats,
+        spell tables) is shared with the prototype, subclasses copy the per-instance state.
+        """
+        clone = copy.copy(self)
+        clone.__dict__.pop("parent", None)
+        clone.prototype_id = prototypes.prototype_name(self) or self.prototype_id
+        return clone
+
     def spawn(self: T, gamemap: GameMap, x: int, y: int) -> T:
         """Spawn a copy of this instance at the given location."""
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
         clone.parent = gamemap
@@ -103,7 +181,7 @@ class Entity:
 
     def spawn_summon(self: T, gamemap: GameMap, x: int, y: int, duration: int) -> T:
         """Spawn a copy of this instance at the given location."""
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
         clone.parent = gamemap
@@ -111,35 +189,25 @@ class Entity:
         except: None
         clone.battler.current_buffs["Player Summoned"] = (gamemap.engine.current_turn + duration, 0)
         gamemap.entities.add(clone)
+        gamemap.engine.timed_effects.schedule(clone, "Player Summoned")
         return clone
 
-    def spawn_w_items(self: T, gamemap: GameMap, x: int, y: int, inventory: List[Item], equipment: Equipment()
-                      ) -> T:
+    def spawn_w_items(self: T, gamemap: GameMap, x: int, y: int, inventory: List[Item], equipment: Equipment(),
+                      rng = random) -> T:
         """Spawn a copy of this Actor with items at given location."""
         """Equipment adds to inventory and is equipped, Inventory is only loot."""
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         clone.x = x
         clone.y = y
-        clone_equipment = copy.deepcopy(equipment)
-        clone.equipment = clone_equipment
-        clone.equipment.parent = clone
-        clone_inv = copy.deepcopy(inventory)
-        clone.inventory = Inventory(capacity = 26, items = clone_inv)
-        inventory_random = random_choice_from_cr(self.battler.cr)
-        new_random_item = get_inv(inventory_random)
+        clone.equipment = clone_equipment(equipment, clone, {})
+        clone.inventory = Inventory(capacity = 26, items = [item.clone() for item in inventory])
+        inventory_random = random_choice_from_cr(self.battler.cr, rng)
+        new_random_item = get_inv(inventory_random).clone()
         clone.inventory.items.append(new_random_item)
         clone.inventory.parent = clone
-        for item_worn in (clone.equipment.main_hand, clone.equipment.off_hand,
-                          clone.equipment.ranged, clone.equipment.body,
-                          clone.equipment.neck, clone.equipment.waist,
-                          clone.equipment.lring, clone.equipment.rring,
-                          clone.equipment.head, clone.equipment.cloak,
-                          clone.equipment.eyes, clone.equipment.shirt,
-                          clone.equipment.wrists, clone.equipment.feet,
-                          clone.equipment.hands, clone.equipment.misc):
-            if item_worn != None:
-                item_worn.parent = clone.equipment
-        clone.battler.gold = int(clone.base_gold * (random.random() + 0.5)) # gold int between 50% and 150% base gold
+        for item_carried in clone.inventory.items:
+            item_carried.parent = clone.inventory
+        clone.battler.gold = int(clone.base_gold * (rng.random() + 0.5)) # gold int between 50% and 150% base gold
         clone.battler.hp = clone.battler.max_hp # Yes, ugly hack
             
         clone.parent = gamemap
@@ -148,7 +216,7 @@ class Entity:
 
     def place_on_death(self: T, gamemap: GameMap, x: int, y: int) -> T:
         """Spawn an item/gold dropped on death.  Prioritizes near corpse."""
-        clone = copy.deepcopy(self)
+        clone = self.clone()
         temp_x = x
         temp_y = y
         blocked = False
@@ -162,10 +230,8 @@ class Entity:
                 blocked = True
             elif gamemap.tiles[x + i, y + j] != tile_types.floor:
                 blocked = True
-            for entity in gamemap.entities:
-                if entity.x == x + i and entity.y == y + j:
-                    blocked = True
-                    break
+            if gamemap.get_entities_at_location(x + i, y + j):
+                blocked = True
             if blocked == False:
                 temp_x = x + i
                 temp_y = y + j
@@ -187,6 +253,7 @@ class Entity:
                     self.gamemap.entities.remove(self)
             self.parent = gamemap
             gamemap.entities.add(self)
+        self.update_location_index()
 
     def distance(self, x: int, y: int) -> float:
         """
@@ -198,6 +265,7 @@ class Entity:
         # Move the entity by a given amount
         self.x += dx
         self.y += dy
+        self.update_location_index()
 
 class Shop(Entity):
     def __init__(
@@ -306,6 +374,39 @@ class Actor(Entity):
         self.graphic = graphic
         self.graphic_pos = graphic_pos
 
+    def clone(self) -> Actor:
+        """Copy the components that change in play: battler, level, carried and worn items, ai."""
+        clone = super().clone()
+
+        clone.battler = copy_component(self.battler, clone)
+
+        cloned_items = {}
+        clone.inventory = copy.copy(self.inventory)
+        clone.inventory.parent = clone
+        clone.inventory.items = []
+        for item in self.inventory.items:
+            cloned_items[item] = item.clone()
+            cloned_items[item].parent = clone.inventory
+            clone.inventory.items.append(cloned_items[item])
+        clone.equipment = clone_equipment(self.equipment, clone, cloned_items)
+
+        if self.level:
+            clone.level = copy_component(self.level, clone)
+        clone.ai = copy_component(self.ai, clone, "entity") if self.ai else None
+        return clone
+
+    @property
+    def ai(self) -> Optional[BaseAI]:
+        return self._ai
+
+    @ai.setter
+    def ai(self, ai: Optional[BaseAI]) -> None:
+        """Setting ai to None is how an actor dies, so the map's live actors are kept in step."""
+        self._ai = ai
+        parent = self.__dict__.get("parent")
+        if parent is not None and self in getattr(parent, "entity_keys", ()):
+            parent.refresh_liveness(self)
+
     @property
     def is_alive(self) -> bool:
         """Returns True as long as this actor can perform actions."""
@@ -362,6 +463,15 @@ class Item(Entity):
         self.graphic = graphic
         self.graphic_pos = graphic_pos
 
+    def clone(self) -> Item:
+        """Copy the consumable and equippable components, enchanting changes them per item."""
+        clone = super().clone()
+        if self.consumable:
+            clone.consumable = copy_component(self.consumable, clone)
+        if self.equippable:
+            clone.equippable = copy_component(self.equippable, clone)
+        return clone
+
 class Bag(Item):
     def __init__(
         self,
@@ -404,6 +514,11 @@ class Bag(Item):
         self.equippable = equippable
         self.graphic = graphic
         self.graphic_pos = graphic_pos
+
+    def clone(self) -> Bag:
+        clone = super().clone()
+        clone.bag_inventory = copy.deepcopy(self.bag_inventory)
+        return clone
         
 
 class Gold(Entity):
@@ -1,4 +1,5 @@
-from components.ai import HostileEnemy, RangedEnemy, DragonEnemy, SummonedAlly
+from chase_ai import HostileEnemy, RangedEnemy, DragonEnemy
+from components.ai import SummonedAlly
 from components import consumable
 from components.battler import Battler
 from components.inventory import Inventory, Bag_Inventory
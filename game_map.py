@@ -1,23 +1,68 @@
 from __future__ import annotations
 
-from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, TYPE_CHECKING
+import io
+import pickle
+import random
+import traceback
+import zlib
 
 import numpy as np # type: ignore
 from tcod.console import Console
+import pygame
 
 from entity import Actor, Item, Gold, Shop, Enchant, Stairs
 import tile_types
 import ptile_type
+import presentation
 import render_functions
 from loader_functions.initialize_new_game import get_constants
 
 if TYPE_CHECKING:
     from engine import Engine
     from entity import Entity
+    from loader_functions.save_format import SavedFloor
 
 constants = get_constants()
 block_size = constants['block_size']
 
+# Generates the floor below the player's ahead of time, see GameWorld.prepare_next_floor.
+floor_executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "procgen")
+
+DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (1, -1), (-1, 1), (1, 1))
+NEIGHBOURS = np.array(DIRECTIONS)
+UNREACHED = np.iinfo(np.int32).max # Player distance of cells the search hasn't reached
+
+class EntitySet(set):
+    """
+    The set of entities on a GameMap.
+
+    Adding or removing an entity also adds it to or drops it from the map's location index.
+    """
+
+    def __init__(self, entities: Iterable[Entity] = (), gamemap: Optional[GameMap] = None):
+        super().__init__()
+        self.gamemap = gamemap
+        for entity in entities:
+            self.add(entity)
+
+    def add(self, entity: Entity) -> None:
+        if entity not in self:
+            super().add(entity)
+            if self.gamemap is not None:
+                self.gamemap.index_entity(entity)
+
+    def remove(self, entity: Entity) -> None:
+        super().remove(entity)
+        if self.gamemap is not None:
+            self.gamemap.unindex_entity(entity)
+
+    def discard(self, entity: Entity) -> None:
+        if entity in self:
+            self.remove(entity)
+
 class GameMap:
     def __init__(
         self,
@@ -30,8 +75,19 @@ class GameMap:
     ):
         self.engine = engine
         self.width, self.height = width, height
-        self.entities = set(entities)
+
+        self.entity_locations: Dict[Tuple[int, int], Set[Entity]] = {} # Entities in each occupied cell.
+        self.entity_keys: Dict[Entity, Tuple[int, int]] = {} # Cell each entity is filed under.
+        self.blocked_by_entity = np.full(
+            (width, height), fill_value = False, order = "F"
+        ) # Cells holding an entity that blocks movement.
+        self.entities_by_type: Dict[type, Set[Entity]] = {
+            Actor: set(), Item: set(), Gold: set(), Shop: set(), Enchant: set(), Stairs: set(),
+        } # Entities of each type, subclasses included.
+        self.live_actors: Set[Actor] = set()
+        self.entities = EntitySet(entities, gamemap = self)
         self.tiles = np.full((width, height), fill_value = tile_types.wall, order = "F")
+        self.tiles_version = 0 # Bump after changing tiles on a map in play, so FOV is recomputed.
 
         self.dungeon_level = dungeon_level
         self.stairs = stairs
@@ -43,6 +99,32 @@ class GameMap:
             (width, height), fill_value = False, order = "F"
         ) # Tiles the player has seen before.
 
+        self.map_layer = None # Offscreen surface holding the rendered tiles.
+        self.map_layer_codes = np.full(
+            (width, height), fill_value = -1, dtype = np.int8, order = "F"
+        ) # Tile code drawn on map_layer for each cell, -1 if never drawn.
+
+        # Distance of each cell from the player and the (x, y, tiles_version) it was computed for.
+        self.player_distances: Optional[np.ndarray] = None
+        self.player_distances_key: Optional[Tuple[int, int, int]] = None
+        # The flat walkable cells, last ring of cells reached and its distance, see grow_player_distances.
+        self.player_distance_search: Optional[Tuple[np.ndarray, np.ndarray, int]] = None
+
+        # Settings and seed the map was generated from, None if it can't be generated again.
+        self.generation: Optional[Dict[str, int]] = None
+        self.generated: List[Entity] = [] # Entities as generated, see procgen.generated_entities
+        # Fingerprints of generated and of the tiles as generated, see procgen.record_fingerprints.
+        self.generated_fingerprints: Optional[List[bytes]] = None
+        self.tiles_fingerprint: Optional[bytes] = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # Surfaces can't be pickled, the layer is rebuilt on the next render.
+        state["map_layer"] = None
+        state["map_layer_codes"] = np.full_like(self.map_layer_codes, -1)
+        state["player_distances"] = state["player_distances_key"] = state["player_distance_search"] = None
+        return state
+
     @property
     def gamemap(self) -> GameMap:
         return self
@@ -50,48 +132,94 @@ class GameMap:
     @property
     def actors(self) -> Iterator[Actor]:
         """Iterate over this maps living actors."""
-        yield from (
-            entity
-            for entity in self.entities
-            if isinstance(entity, Actor) and entity.is_alive
-        )
+        yield from self.live_actors
 
     @property
     def items(self) -> Iterator[Item]:
-        yield from (entity for entity in self.entities if isinstance(entity, Item))
+        yield from self.entities_by_type[Item]
 
     @property
     def gold_piles(self) -> Iterator[Gold]:
-        yield from (entity for entity in self.entities if isinstance(entity, Gold))
+        yield from self.entities_by_type[Gold]
 
     @property
     def shops(self) -> Iterator[Shop]:
-        yield from (entity for entity in self.entities if isinstance(entity, Shop))
+        yield from self.entities_by_type[Shop]
 
     @property
     def enchant(self) -> Iterator[Enchant]:
-        yield from (entity for entity in self.entities if isinstance(entity, Enchant))
+        yield from self.entities_by_type[Enchant]
 
     @property
     def stairs_iter(self) -> Iterator[Stairs]:
-        yield from (entity for entity in self.entities if isinstance(entity, Stairs))
+        yield from self.entities_by_type[Stairs]
+
+    def index_entity(self, entity: Entity) -> None:
+        """File a newly added entity under its cell and its types."""
+        self.file_location(entity)
+        for entity_type, members in self.entities_by_type.items():
+            if isinstance(entity, entity_type):
+                members.add(entity)
+        self.refresh_liveness(entity)
+
+    def unindex_entity(self, entity: Entity) -> None:
+        """Drop a removed entity from its cell and its types."""
+        self.unfile_location(entity)
+        for members in self.entities_by_type.values():
+            members.discard(entity)
+        self.live_actors.discard(entity)
+
+    def refresh_liveness(self, entity: Entity) -> None:
+        """Keep live_actors current after an actor was added, died or was revived."""
+        if isinstance(entity, Actor) and entity.is_alive:
+            self.live_actors.add(entity)
+        else:
+            self.live_actors.discard(entity)
+
+    def file_location(self, entity: Entity) -> None:
+        key = (entity.x, entity.y)
+        self.entity_keys[entity] = key
+        self.entity_locations.setdefault(key, set()).add(entity)
+        self.refresh_blocked(key)
+
+    def unfile_location(self, entity: Entity) -> None:
+        key = self.entity_keys.pop(entity)
+        bucket = self.entity_locations[key]
+        bucket.discard(entity)
+        if not bucket:
+            del self.entity_locations[key]
+        self.refresh_blocked(key)
+
+    def update_entity_location(self, entity: Entity) -> None:
+        """Refile an entity after it moved or its blocks_movement changed."""
+        self.unfile_location(entity)
+        self.file_location(entity)
+
+    def refresh_blocked(self, key: Tuple[int, int]) -> None:
+        if self.in_bounds(*key):
+            self.blocked_by_entity[key] = any(
+                entity.blocks_movement for entity in self.entity_locations.get(key, ())
+            )
+
+    def get_entities_at_location(self, x: int, y: int) -> Set[Entity]:
+        """Return the entities at x, y.  The set is the live index bucket, don't modify it."""
+        return self.entity_locations.get((x, y), set())
 
     def get_blocking_entity_at_location(
         self, location_x: int, location_y: int,
     ) -> Optional[Entity]:
-        for entity in self.entities:
-            if (
-                entity.blocks_movement
-                and entity.x == location_x
-                and entity.y == location_y
-            ):
+        if not self.in_bounds(location_x, location_y) or not self.blocked_by_entity[location_x, location_y]:
+            return None
+
+        for entity in self.get_entities_at_location(location_x, location_y):
+            if entity.blocks_movement:
                 return entity
             
         return None
 
     def get_actor_at_location(self, x: int, y: int) -> Optional[Actor]:
-        for actor in self.actors:
-            if actor.x == x and actor.y == y:
+        for actor in self.get_entities_at_location(x, y):
+            if isinstance(actor, Actor) and actor.is_alive:
                 return actor
 
         return None
@@ -100,6 +228,102 @@ class GameMap:
         """Return True if x and y are inside of the bounds of this map."""
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def distance_to_player(self, x: int, y: int) -> int:
+        """
+        Return how many steps x, y is from the player, diagonal steps included, or UNREACHED
+        if it can't reach the player.
+
+        The distances are shared by every monster chasing the player and only worked out
+        again after the player moves or the tiles change.  The breadth first search behind
+        them stops at the furthest monster that has asked so far.
+        """
+        player = self.engine.player
+        key = (player.x, player.y, self.tiles_version)
+        if self.player_distances_key != key:
+            self.player_distances = np.full((self.width, self.height), UNREACHED, dtype = np.int32, order = "F")
+            self.player_distances[player.x, player.y] = 0
+            walkable = self.tiles["walkable"].ravel(order = "F")
+            self.player_distance_search = (walkable, np.array([player.x + player.y * self.width]), 0)
+            self.player_distances_key = key
+        while self.player_distances[x, y] == UNREACHED and self.grow_player_distances():
+            pass
+        return int(self.player_distances[x, y])
+
+    def grow_player_distances(self) -> bool:
+        """Reach the next ring of cells around the player, False once there are none left."""
+        walkable, frontier, steps = self.player_distance_search
+        if not len(frontier):
+            return False
+        xs = (frontier % self.width)[:, None] + NEIGHBOURS[:, 0]
+        ys = (frontier // self.width)[:, None] + NEIGHBOURS[:, 1]
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        cells = np.unique(xs[inside] + ys[inside] * self.width)
+        distances = self.player_distances.ravel(order = "F") # A view, the array is in F order
+        cells = cells[walkable[cells] & (distances[cells] == UNREACHED)]
+        distances[cells] = steps + 1
+        self.player_distance_search = (walkable, cells, steps + 1)
+        return True
+
+    def step_toward_player(self, x: int, y: int) -> Optional[Tuple[int, int]]:
+        """
+        Return the (dx, dy) step from x, y toward the player, avoiding cells blocked by
+        entities, or None if no open neighbouring cell is closer to the player.
+        """
+        best_step, best_distance = None, self.distance_to_player(x, y)
+        # Every cell closer than x, y has been reached by now.
+        distances = self.player_distances
+        for dx, dy in DIRECTIONS:
+            step_x, step_y = x + dx, y + dy
+            if (
+                self.in_bounds(step_x, step_y) and distances[step_x, step_y] < best_distance
+                and not self.blocked_by_entity[step_x, step_y]
+            ):
+                best_step, best_distance = (dx, dy), distances[step_x, step_y]
+        return best_step
+
+    def path_to_player(self, x: int, y: int) -> List[Tuple[int, int]]:
+        """
+        Return the cells from x, y to the player, as BaseAI.get_path_to does, or an empty
+        list if there's no open way closer.  Only the first step avoids entities.
+        """
+        step = self.step_toward_player(x, y)
+        if step is None:
+            return []
+        x, y = x + step[0], y + step[1]
+        path = [(x, y)]
+        distances = self.player_distances
+        while distances[x, y] > 0:
+            x, y = min(
+                ((x + dx, y + dy) for dx, dy in DIRECTIONS if self.in_bounds(x + dx, y + dy)),
+                key = lambda cell: distances[cell],
+            )
+            path.append((x, y))
+        return path
+
+    def update_map_layer(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Redraw the cells of the map layer whose visible, explored or tile state changed.
+
+        Returns the x and y arrays of the redrawn cells.
+        """
+        if self.map_layer is None:
+            self.map_layer = pygame.Surface((self.width*block_size, self.height*block_size)).convert()
+            self.map_layer_codes[:] = -1
+
+        states = np.select(
+            condlist = [self.visible, self.explored],
+            choicelist = [ptile_type.VISIBLE, ptile_type.EXPLORED],
+            default = ptile_type.UNSEEN,
+        )
+        codes = ptile_type.tile_code(states, self.tiles == tile_types.floor)
+
+        tile_images = ptile_type.get_tile_images()
+        changed_x, changed_y = np.nonzero(codes != self.map_layer_codes)
+        for i, j in zip(changed_x, changed_y):
+            self.map_layer.blit(tile_images[codes[i, j]], (i*block_size, j*block_size))
+        self.map_layer_codes[:] = codes
+        return changed_x, changed_y
+
     def render(self, screen: pygame.display) -> None:
         """
         Renders the map.
@@ -107,52 +331,77 @@ class GameMap:
         If a tile is in the "visible" array, then draw it with the "light" colors.
         If it isn't, but it's in the "explored" array, then draw it with the "dark" colors.
         Otherwise, the default is "SHROUD".
-        """
 
+        The tiles are kept on an offscreen map layer, and only the cells whose tile code
+        changed since the last frame are redrawn before the layer is blitted in one go.
+        Only those cells and the drawn entities are marked for presenting.
         """
-        self.tiles[0 : self.width, 0 : self.height] = np.select(
-            condlist=[self.visible, self.explored],
-            choicelist=[self.tiles["light"], self.tiles["dark"]],
-            default=ptile_type.SHROUD
-        )
-        """
-        ch_floor = ptile_type.floors
-        ch_wall = ptile_type.walls
-        ch_tile = ptile_type.tiles
-        for i in range(self.width):
-            for j in range(self.height):
-                if self.visible[i][j]:
-                    if self.tiles[i, j] == tile_types.floor:
-                        screen.blit(ch_floor, (i*block_size, j*block_size), (64, 64, 16, 16))
-                    else:
-                        screen.blit(ch_wall, (i*block_size, j*block_size), (3*16, 18*16, 16, 16))
-                elif self.explored[i][j]:
-                    if self.tiles[i, j] == tile_types.floor:
-                        screen.blit(ch_floor, (i*block_size, j*block_size), (9*16, 0, 16, 16))
-                        screen.blit(ch_floor, (i*block_size, j*block_size), (4*16, 13*16, 16, 16))
-                    else:
-                        screen.blit(ch_wall, (i*block_size, j*block_size), (8*16, 0, 16, 16))
-                        screen.blit(ch_wall, (i*block_size, j*block_size), (3*16, 24*16, 16, 16))
-                else:
-                    screen.blit(ch_tile, (i*block_size, j*block_size), (0, 32, 16, 16))
-                #screen.blit(ptile_type.floors, (i*block_size, j*block_size), (choice[2][0][0], choice[2][0][1], choice[2][1][0], choice[2][1][1]))
-        """
-        console.tiles_rgb[0 : self.width, 0 : self.height] = 10150, [255, 255, 0], [0, 0, 0]
-        """
+        changed_x, changed_y = self.update_map_layer()
+        screen.blit(self.map_layer, (0, 0))
+        if len(changed_x) > 64: # Many cells, as on a new floor, are presented as one rect.
+            presentation.mark_dirty(pygame.Rect(
+                changed_x.min()*block_size, changed_y.min()*block_size,
+                (changed_x.max() - changed_x.min() + 1)*block_size, (changed_y.max() - changed_y.min() + 1)*block_size,
+            ))
+        else:
+            for i, j in zip(changed_x, changed_y):
+                presentation.mark_dirty(pygame.Rect(i*block_size, j*block_size, block_size, block_size))
+
         entities_sorted_for_rendering = sorted(
             self.entities, key = lambda x: x.render_order.value
         )
         
         for entity in entities_sorted_for_rendering:
             # Only print entities that are in the FOV, or previously seen stairs and shops.
-            if self.visible[entity.x, entity.y] or ((entity in self.stairs_iter or entity in self.shops) and self.explored[entity.x, entity.y]):
-                render_functions.draw_entity(screen, entity)
+            if self.visible[entity.x, entity.y] or (
+                (entity in self.entities_by_type[Stairs] or entity in self.entities_by_type[Shop])
+                and self.explored[entity.x, entity.y]
+            ):
+                presentation.mark_overlay(render_functions.draw_entity(screen, entity))
             else:
                 pass
 
+class FloorPickler(pickle.Pickler):
+    """Pickles a stored floor, writing the engine and player as references instead of copies."""
+
+    def __init__(self, file, engine: Engine):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.engine = engine
+
+    def persistent_id(self, obj) -> Optional[str]:
+        if obj is self.engine:
+            return "engine"
+        if obj is self.engine.player:
+            return "player"
+        return None
+
+class FloorUnpickler(pickle.Unpickler):
+    """Loads a stored floor, reattaching it to the running engine and player."""
+
+    def __init__(self, file, engine: Engine):
+        super().__init__(file)
+        self.engine = engine
+
+    def persistent_load(self, pid: str):
+        if pid == "engine":
+            return self.engine
+        if pid == "player":
+            return self.engine.player
+        raise pickle.UnpicklingError(f"Unknown persistent id {pid}")
+
 class GameWorld:
     """
     Holds the settings for the GameMap, and generates new maps when moving down the stairs.
+
+    Visited floors are kept by dungeon_level.  The most recent ones stay in memory, older
+    ones are packed into compressed pickles, and both are loaded back instead of generating
+    the floor again.
+
+    Each floor is generated from its own seed, derived from the seed of the run, so the
+    same run always gets the same floors.  That lets the floor below be generated on a
+    worker thread while the player is busy with this one, fingerprints for saving included.
+
+    Floors the player isn't on also keep their save section, see SavedFloor.
     """
 
     def __init__(
@@ -164,9 +413,11 @@ class GameWorld:
         max_rooms: int,
         room_min_size: int,
         room_max_size: int,
-        current_floor: int = 0
+        current_floor: int = 0,
+        seed: Optional[int] = None,
     ):
         self.engine = engine
+        self.seed = random.getrandbits(64) if seed is None else seed
 
         self.map_width = map_width
         self.map_height = map_height
@@ -178,31 +429,140 @@ class GameWorld:
 
         self.current_floor = current_floor
 
+        self.floors: OrderedDict[int, GameMap] = OrderedDict() # Recently left floors, oldest first
+        self.packed_floors: Dict[int, bytes] = {}
+        # Floors of a loaded save that haven't been needed yet, see SaveReader.
+        self.unloaded_floors: Dict[int, Callable[[], GameMap]] = {}
+        self.saved_floors: Dict[int, SavedFloor] = {} # Save sections of the floors the player isn't on
+        # Generation of the floor below and the worker's (map, arrival location) for it.
+        self.next_floor: Optional[Tuple[Dict[str, int], Future]] = None
+        self.player_locations: Dict[int, Tuple[int, int]] = {} # Where the player left each floor
+
     def generate_floor(self, stairs: int = 0) -> None:
-        from procgen import generate_dungeon, generate_town
+        """Take the stairs up (-1) or down (1) from the current floor."""
+        self.change_floor(self.engine.game_map.dungeon_level + stairs, stairs)
+
+    def floor_seed(self, dungeon_level: int) -> int:
+        # Seeding with a string hashes it with sha512, the same in every Python process.
+        return random.Random(f"{self.seed}:{dungeon_level}").getrandbits(64)
+
+    def floor_generation(self, dungeon_level: int, stairs: int = 1) -> Dict[str, int]:
+        """Return the settings procgen.generate_floor generates dungeon_level from."""
+        return {
+            "seed": self.floor_seed(dungeon_level),
+            "dungeon_level": dungeon_level,
+            "stairs": stairs,
+            "map_width": self.map_width,
+            "map_height": self.map_height,
+            "max_rooms": self.max_rooms,
+            "room_min_size": self.room_min_size,
+            "room_max_size": self.room_max_size,
+            "cave": int(dungeon_level in constants['cave_levels']),
+        }
+
+    def build_floor(self, dungeon_level: int, stairs: int = 1) -> GameMap:
+        """Generate dungeon_level from its seed with the player on it, using the prepared floor if there is one."""
+        from procgen import generate_floor
+
+        generation = self.floor_generation(dungeon_level, stairs)
+        if self.next_floor is not None:
+            next_generation, future = self.next_floor
+            self.next_floor = None
+            # Wait if the worker is part way through, generate it here if it hasn't started or failed.
+            if next_generation == generation and not future.cancel():
+                try:
+                    game_map, location = future.result()
+                except Exception:
+                    traceback.print_exc()
+                else:
+                    game_map.engine = self.engine
+                    self.engine.player.place(*location, game_map)
+                    return game_map
+        return generate_floor(self.engine, generation)
+
+    def prepare_next_floor(self) -> None:
+        """Start generating the floor below the current one on the worker, if it is new."""
+        from procgen import generate_detached_floor
+
+        dungeon_level = self.engine.game_map.dungeon_level + 1
+        if self.visited(dungeon_level) or (self.next_floor and self.next_floor[0]["dungeon_level"] == dungeon_level):
+            return
+        if self.next_floor is not None:
+            self.next_floor[1].cancel()
+        generation = self.floor_generation(dungeon_level, 1)
+        self.next_floor = (generation, floor_executor.submit(generate_detached_floor, generation))
+
+    def visited(self, dungeon_level: int) -> bool:
+        return (
+            dungeon_level in self.floors or dungeon_level in self.packed_floors
+            or dungeon_level in self.unloaded_floors
+        )
+
+    def change_floor(self, dungeon_level: int, stairs: int = 0) -> None:
+        """
+        Move the player to dungeon_level, loading the floor if it was visited before.
+
+        stairs is the direction travelled, 0 for the town portal.  A visited floor is
+        entered on its stairs leading back, or by portal where the player left it.
+        """
+        old_map = self.engine.game_map
+        player = self.engine.player
+        self.player_locations[old_map.dungeon_level] = (player.x, player.y)
 
         self.stairs = stairs
-        self.current_floor = self.engine.game_map.dungeon_level
-        self.current_floor += self.stairs
-
-        if self.current_floor == 0:
-            self.engine.game_map = generate_town(
-                engine = self.engine,
-                max_rooms=self.max_rooms,
-                room_min_size=self.room_min_size,
-                room_max_size=self.room_max_size,
-                map_width=self.map_width,
-                map_height=self.map_height,
-                dungeon_level = self.current_floor
-            )
+        self.current_floor = dungeon_level
+
+        saved_floor = self.saved_floors.pop(dungeon_level, None)
+        if saved_floor is not None:
+            saved_floor.release()
+        game_map = self.load_floor(dungeon_level)
+        if game_map is not None:
+            self.engine.game_map = game_map
+            player.place(*self.arrival_location(game_map, stairs), game_map)
         else:
-            self.engine.game_map = generate_dungeon(
-                max_rooms=self.max_rooms,
-                room_min_size=self.room_min_size,
-                room_max_size=self.room_max_size,
-                map_width=self.map_width,
-                map_height=self.map_height,
-                engine=self.engine,
-                dungeon_level = self.current_floor,
-                stairs = self.stairs
-            )
+            self.engine.game_map = self.build_floor(self.current_floor, self.stairs or 1)
+
+        if old_map is not self.engine.game_map:
+            self.store_floor(old_map)
+            # Buffs on a floor the player left are dropped from the schedule, add them back.
+            self.engine.timed_effects.schedule_actors(self.engine.game_map.actors)
+        self.prepare_next_floor()
+
+    def arrival_location(self, game_map: GameMap, stairs: int) -> Tuple[int, int]:
+        """Return the stairs leading back the way the player came, or where they left the floor."""
+        if stairs:
+            for entity in game_map.stairs_iter:
+                if entity.stairs == -stairs:
+                    return entity.x, entity.y
+        return self.player_locations[game_map.dungeon_level]
+
+    def store_floor(self, game_map: GameMap) -> None:
+        """Keep a floor the player has left, packing the oldest in memory past the limit."""
+        from loader_functions.save_format import SavedFloor
+
+        self.floors[game_map.dungeon_level] = game_map
+        self.floors.move_to_end(game_map.dungeon_level)
+        self.saved_floors[game_map.dungeon_level] = SavedFloor(self.engine, game_map = game_map)
+        while len(self.floors) > constants['floors_in_memory']:
+            dungeon_level, oldest = self.floors.popitem(last = False)
+            self.packed_floors[dungeon_level] = self.pack_floor(oldest)
+            if dungeon_level in self.saved_floors:
+                self.saved_floors[dungeon_level].pack(self.packed_floors[dungeon_level])
+
+    def load_floor(self, dungeon_level: int) -> Optional[GameMap]:
+        """Take a visited floor out of the store, None if it hasn't been visited."""
+        if dungeon_level in self.floors:
+            return self.floors.pop(dungeon_level)
+        if dungeon_level in self.packed_floors:
+            return self.unpack_floor(self.packed_floors.pop(dungeon_level))
+        if dungeon_level in self.unloaded_floors:
+            return self.unloaded_floors.pop(dungeon_level)()
+        return None
+
+    def pack_floor(self, game_map: GameMap) -> bytes:
+        buffer = io.BytesIO()
+        FloorPickler(buffer, self.engine).dump(game_map)
+        return zlib.compress(buffer.getvalue())
+
+    def unpack_floor(self, data: bytes) -> GameMap:
+        return FloorUnpickler(io.BytesIO(zlib.decompress(data)), self.engine).load()
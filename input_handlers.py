@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import Callable, Optional, Tuple, TYPE_CHECKING, List, Union
 
 from loader_functions.data_loaders import save_game, load_game
+from loader_functions.autosave import autosaver
 from loader_functions.initialize_new_game import get_constants
 from render_functions import render_bar
 from feat_stuff import get_all_feats, get_feat_reqs
@@ -12,7 +13,6 @@ import components.enchanter
 import traceback
 from setup_game import new_game
 
-from procgen import generate_dungeon, generate_town
 from entity import Item, Bag
 from EventDispatch import EventDispatch
  
@@ -46,6 +46,8 @@ from actions import (
 )
 import colors
 import exceptions
+import presentation
+from text_rendering import text_to_screen
 
 
 if TYPE_CHECKING:
@@ -53,8 +55,6 @@ if TYPE_CHECKING:
 
 constants = get_constants()
 block_size = constants['block_size']
-gui_image = pygame.image.load(os.path.join('Dawnlike', 'GUI', 'GUI1.png'))
-decor_image = pygame.image.load(os.path.join('Dawnlike', 'Objects', 'Decor0.png'))
 
 MOVE_KEYS = {
     # Arrow keys.
@@ -155,7 +155,6 @@ class BaseEventHandler(EventDispatch[ActionOrHandler]):
     def ev_mousemotion(self, event: pygame.MouseMotion) -> None:
         (x_raw, y_raw) = pygame.mouse.get_pos()
         self.engine.mouse_location = (int(x_raw/block_size),  int(y_raw/block_size))
-        pygame.display.update()
 
     def on_render(self, screen: pygame.display) -> None:
         raise NotImplementedError()
@@ -166,11 +165,11 @@ class BaseEventHandler(EventDispatch[ActionOrHandler]):
     def ev_audiodeviceadded(self, event: pygame.event):
         pass
 
-def text_to_screen(screen, text = '', color = colors.white, size = 16, position = (0, 0), font = 'arial'):
-    font = pygame.font.SysFont(font, size)
-    image = font.render(text, True, color)
-    screen.blit(image, position)
-
+def start_new_game(char_choice: str) -> Engine:
+    """Set up a new game and start generating the floor below the first one."""
+    engine = new_game(char_choice = char_choice)
+    engine.game_world.prepare_next_floor()
+    return engine
 
 class MainMenu(BaseEventHandler):
     """Handle the main menu rendering and input."""
@@ -183,7 +182,7 @@ class MainMenu(BaseEventHandler):
         screen.blit(background_image, (0, 0))
         text_to_screen(screen, text = 'Generic d20 Roguelike', color = colors.white, size = 32, position = (30*block_size, 5*block_size))
         text_to_screen(screen, text = 'By (Robert Wilhelm)', color = colors.white, size = 32, position = (30*block_size, 8*block_size))
-        pygame.display.update()
+        presentation.mark_all_dirty()
         for i, text in enumerate(
             ["[C] Continue last game",
              "[B] Play as Orc Barbarian",
@@ -204,32 +203,33 @@ class MainMenu(BaseEventHandler):
         if button == pygame.K_q or button == pygame.K_ESCAPE:
             raise SystemExit()
         elif button == pygame.K_c:
-            engine = load_game('savegame')
+            engine = load_game() # Newest of the save and the autosave
+            autosaver.mark_saved(engine)
             temp = MainGameEventHandler(engine)
             #temp.state = MainGameEventHandler(engine)
             return temp
         elif button == pygame.K_f:
-            temp =  MainGameEventHandler(new_game(char_choice = "human_fighter"))
+            temp =  MainGameEventHandler(start_new_game(char_choice = "human_fighter"))
             #temp.state = MainGameEventHandler(temp.engine)
             return temp
         elif button == pygame.K_b:
-            temp = MainGameEventHandler(new_game(char_choice = "orc_barbarian"))
+            temp = MainGameEventHandler(start_new_game(char_choice = "orc_barbarian"))
             #temp.state = MainGameEventHandler(temp.engine)
             return temp
         elif button == pygame.K_h:
-            temp = MainGameEventHandler(new_game(char_choice = "human_cleric"))
+            temp = MainGameEventHandler(start_new_game(char_choice = "human_cleric"))
             #temp.state = MainGameEventHandler(temp.engine)
             return temp
         elif button == pygame.K_d:
-            temp = MainGameEventHandler(new_game(char_choice = "dwarf_fighter"))
+            temp = MainGameEventHandler(start_new_game(char_choice = "dwarf_fighter"))
             #temp.state = MainGameEventHandler(temp.engine)
             return temp
         elif button == pygame.K_e:
-            temp =  MainGameEventHandler(new_game(char_choice = "elf_wizard"))
+            temp =  MainGameEventHandler(start_new_game(char_choice = "elf_wizard"))
             #temp.state = MainGameEventHandler(temp.engine)
             return temp
         elif button == pygame.K_g:
-            temp = MainGameEventHandler(new_game(char_choice = "graphics_test"))
+            temp = MainGameEventHandler(start_new_game(char_choice = "graphics_test"))
             #temp.state = MainGameEventHandler(temp.engine)
             return temp
         else:
@@ -273,12 +273,13 @@ class EventHandler(BaseEventHandler):
 
         self.engine.handle_enemy_turns()
         self.engine.update_fov()
+        autosaver.check(self.engine)
         #self.state = MainGameEventHandler(self.engine)
         return MainGameEventHandler(self.engine)
 
     def on_render(self, screen: pygame.display) -> None:
         self.engine.update_fov()
-        pygame.display.update()
+        presentation.mark_all_dirty()
 
 class MainGameEventHandler(EventHandler):
     def ev_keydown(
@@ -394,6 +395,7 @@ class HistoryViewer(EventHandler):
 
     def __init__(self, engine: Engine):
         self.engine = engine
+        engine.message_log.load_history()
         self.log_length = len(engine.message_log.messages)
         self.cursor = self.log_length - 1
 
@@ -420,7 +422,7 @@ class HistoryViewer(EventHandler):
             self.engine.message_log.messages,
         )
         screen.blit(log_console, (x*block_size, y*block_size))
-        pygame.display.update()
+        presentation.mark_all_dirty()
 
     def ev_keydown(self, event: pygame.KeyDown) -> None:
         # Fancy conditional movement to make it feel right.
@@ -553,8 +555,6 @@ class TownPortalEventHandler(AskUserEventHandler):
         screen.blit(town_portal_screen, (0,0))
 
     def ev_keydown(self, event: pygame.KeyDown) -> Optional[ActionOrHandler]:
-        from loader_functions.initialize_new_game import get_constants
-        constants = get_constants()
         player = self.engine.player
         engine = self.engine
         key = event.key
@@ -565,25 +565,9 @@ class TownPortalEventHandler(AskUserEventHandler):
             if key == pygame.K_y:
                 if engine.game_map.dungeon_level > 0:
                     engine.last_level = engine.game_map.dungeon_level
-                    engine.game_map = generate_town(
-                        engine = engine,
-                        max_rooms = constants['max_rooms'],
-                        room_min_size = constants['room_min_size'],
-                        room_max_size = constants['room_max_size'],
-                        map_width = constants['map_width'],
-                        map_height = constants['map_height'],
-                    )
+                    engine.game_world.change_floor(0)
                 else:
-                    engine.game_map = generate_dungeon(
-                        max_rooms = constants['max_rooms'],
-                        room_min_size = constants['room_min_size'],
-                        room_max_size = constants['room_max_size'],
-                        map_width = constants['map_width'],
-                        map_height = constants['map_height'],
-                        engine = engine,
-                        dungeon_level = engine.last_level,
-                        stairs = 1
-                    )
+                    engine.game_world.change_floor(engine.last_level)
                     engine.last_level = 0
                 engine.update_fov()
                 return MainGameEventHandler(engine)
@@ -1353,7 +1337,7 @@ class RestingEventHandler(AskUserEventHandler):
         else:
             if key > 47 and key < 58:
                 self.num_turns += chr(ord("a") + index)  # 0 to 9
-            pygame.display.update()
+            presentation.mark_all_dirty()
             
 
 class TextEntryEventHandler(AskUserEventHandler):
@@ -1384,7 +1368,7 @@ class TextEntryEventHandler(AskUserEventHandler):
         text_to_screen(text_screen, text = f"{self.input_text}",
                        position = (0*block_size, (y + 1)*block_size))
         screen.blit(text_screen, (x*block_size, 0))
-        pygame.display.update()
+        presentation.mark_all_dirty()
 
     def ev_keydown(
         self, event: pygame.KeyDown
@@ -1438,6 +1422,7 @@ class LoadGameEventHandler(TextEntryEventHandler):
             #message log needs render or it never is visible to player.
             print(f"Game attempting to load {self.input_text}.")
             engine = load_game(self.input_text)
+            autosaver.mark_saved(engine)
             temp = MainGameEventHandler(engine)
             #temp.state = MainGameEventHandler(engine)
             return temp
@@ -1919,7 +1904,7 @@ class EquipmentHandler(AskUserEventHandler):
                 line = f"({letter})    {check_list[i].name} ({equipment_set[i]})"
             text_to_screen(screen, line, position = (10*16, 16*10+16*i))
         render_bar(screen, self.engine)
-        pygame.display.update()
+        presentation.mark_all_dirty()
                 
 
     def ev_keydown(
@@ -2004,7 +1989,6 @@ class SelectIndexHandler(AskUserEventHandler):
     def ev_mousemotion(self, event: pygame.MouseMotion) -> None:
         (x_raw, y_raw) = pygame.mouse.get_pos()
         self.engine.mouse_location = (int(x_raw/block_size),  int(y_raw/block_size))
-        pygame.display.update()
 
     def on_index_selected(self, x: int, y: int) -> Optional[ActionOrHandler]:
         """Called when an index is selected."""
@@ -2258,28 +2242,3 @@ class SummonMonsterHandler(SelectIndexHandler):
 
     def on_index_selected(self, x: int, y: int) -> Optional[ActionOrHandler]:
         return self.callback((x, y))
-    
-class TakeStairsHandler(EventHandler):
-    #Takes stairs, up or down, generating new level.
-    #No longer implements, see Actions
-    
-    def ___init__(
-        self,
-        engine: Engine,
-    ):
-        constants = get_constants()
-        for entity in self.engine.game_map.entities:
-            if (entity.stairs and entity.x == self.engine.player.x and entity.y == self.engine.player.y):
-                self.engine.game_map = generate_dungeon(
-                    max_rooms = constants['max_rooms'],
-                    room_min_size = constants['room_min_size'],
-                    room_max_size = constants['room_max_size'],
-                    map_width = constants['map_width'],
-                    map_height = constants['map_height'],
-                    dungeon_level = self.engine.game_map.dungeon_level + entity.stairs.stairs,
-                    engine = self.engine,
-                )
-            return MainGameEventHandler(self.engine)
-        self.engine.message_log.add_message("There are no stairs here.", colors.white)
-        return MainGameEventHandler(self.engine)
-
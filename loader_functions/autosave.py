@@ -0,0 +1,50 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import traceback
+
+from loader_functions.data_loaders import AUTOSAVE_NAME, save_path, write_save_file
+from loader_functions.initialize_new_game import get_constants
+from loader_functions.save_format import SaveWriter
+
+constants = get_constants()
+
+class Autosaver:
+    """
+    Saves the game every few turns and on each new floor without stalling the game.
+
+    The player, the current floor and the engine are pickled on the main thread between
+    turns, which is quick and can't see the game half way through an action.  Encoding
+    the floors the player has left, compressing, writing and syncing the file happen on
+    a worker thread.
+    """
+
+    def __init__(self, save_name: str = AUTOSAVE_NAME, interval: int = constants['autosave_turns']):
+        self.save_name = save_name
+        self.interval = interval
+        self.last_turn = None
+        self.last_game_map = None
+        # One worker, so autosaves reach the disk in the order they were taken.
+        self.executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "autosave")
+
+    def check(self, engine) -> None:
+        """Autosave if the player changed floor or interval turns passed, call between turns."""
+        if (engine.game_map is not self.last_game_map or self.last_turn is None
+                or engine.current_turn - self.last_turn >= self.interval):
+            self.save(engine)
+
+    def mark_saved(self, engine) -> None:
+        """Count a loaded game as saved, so it isn't written again straight after loading."""
+        self.last_turn = engine.current_turn
+        self.last_game_map = engine.game_map
+
+    def save(self, engine) -> Future:
+        sections = SaveWriter(engine).write()
+        self.mark_saved(engine)
+        future = self.executor.submit(write_save_file, save_path(self.save_name), sections)
+        future.add_done_callback(report_error)
+        return future
+
+def report_error(future: Future) -> None:
+    if future.exception() is not None:
+        traceback.print_exception(type(future.exception()), future.exception(), future.exception().__traceback__)
+
+autosaver = Autosaver()
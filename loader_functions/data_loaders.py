@@ -1,24 +1,50 @@
 import os
-
-import shelve
 import pickle
-import copy
-
-def save_game(engine, save_name: str = 'savegame'):
-    with shelve.open(save_name, 'n') as data_file:
-        data_file['engine'] = engine
-        data_file['player'] = engine.player
-        data_file['game_map'] = engine.game_map
-        data_file.close()
-
-def load_game(save_name: str = 'savegame'):
-    if not os.path.isfile('savegame.dat'):
-        raise FileNotFoundError
-
-    with shelve.open(save_name, 'r') as data_file:
-        engine = data_file['engine']
-        player = data_file['player']
-        game_map = data_file['game_map']
-        data_file.close()
-
-    return engine
+import zlib
+
+from loader_functions.save_format import SaveReader, SaveWriter, read_container, write_container
+
+SAVE_EXTENSION = '.sav'
+DEFAULT_SAVE_NAME = 'savegame'
+AUTOSAVE_NAME = 'autosave'
+
+def save_path(save_name: str) -> str:
+    return save_name + SAVE_EXTENSION
+
+def write_save_file(path: str, sections) -> None:
+    """Write a save next to path, flush it to disk, then rename it into place."""
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as data_file:
+        write_container(data_file, sections)
+        data_file.flush()
+        os.fsync(data_file.fileno())
+    os.replace(temp_path, path)
+
+def save_game(engine, save_name: str = DEFAULT_SAVE_NAME):
+    write_save_file(save_path(save_name), SaveWriter(engine).write())
+
+def read_save(path: str, renderer = None):
+    with open(path, 'rb') as data_file:
+        sections = read_container(data_file)
+
+    return SaveReader(sections).load_engine(renderer)
+
+def load_game(save_name: str = None, renderer = None):
+    """
+    Load the named save, drawing with renderer, pygame by default.
+
+    With no name, load the newest of the default save and the autosave that loads
+    without error.
+    """
+    if save_name is not None:
+        if not os.path.isfile(save_path(save_name)):
+            raise FileNotFoundError(save_path(save_name))
+        return read_save(save_path(save_name), renderer)
+
+    paths = [save_path(name) for name in (DEFAULT_SAVE_NAME, AUTOSAVE_NAME) if os.path.isfile(save_path(name))]
+    for path in sorted(paths, key = os.path.getmtime, reverse = True):
+        try:
+            return read_save(path, renderer)
+        except (ValueError, EOFError, KeyError, pickle.UnpicklingError, zlib.error):
+            print(f"Skipping unreadable save {path}.")
+    raise FileNotFoundError(save_path(DEFAULT_SAVE_NAME))
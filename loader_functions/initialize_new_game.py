@@ -1,30 +1,18 @@
+from types import MappingProxyType
+import functools
+
 import tcod
 
+@functools.lru_cache(maxsize = None)
 def get_constants():
-    window_title = 'Generic d20 Roguelike'
+    """
+    Return the game's numeric settings.
 
-    tileset = tcod.tileset.load_tilesheet(
-        "NewDFtest.png", 16, 16, tcod.tileset.CHARMAP_CP437
-    )
-
-    test_list = list(range(10001,11920))
-    
-    tileset2 = tcod.tileset.load_tilesheet(
-        "16x16.png", 32, 60, test_list
-    )
-
-    for i in range(10001,11920):
-        tileset.set_tile(i, tileset2.get_tile(i))
-
-    test3_list = list(range(12001, 12192))
-
-    tileset3 = tcod.tileset.load_tilesheet(
-        "wallstuff.png", 32, 10, test3_list
-    )
+    Built once on first call and read-only afterwards, so importing modules can share it.
+    No images are loaded here, the tcod tileset comes from get_tileset().
+    """
+    window_title = 'Generic d20 Roguelike'
 
-    for i in range(12001, 12192):
-        tileset.set_tile(i, tileset3.get_tile(i))
- 
     screen_width = 80
     screen_height = 50
 
@@ -45,12 +33,22 @@ def get_constants():
     room_min_size = 6
     max_rooms = 30
 
+    cave_levels = (3, 6, 9, 12, 15) # Dungeon levels generated as caves instead of rooms
+    cave_wall_chance = 0.45 # Share of cells starting as wall before the caves are smoothed
+    cave_smoothing_steps = 5
+
     max_monsters_per_room = 2
     max_items_per_room = 2
+
+    max_fps = 60 # Cap on redraws per second
+    idle_wait = 1000 # Milliseconds the main loop sleeps waiting for input
+
+    autosave_turns = 100 # Turns between autosaves, the game also autosaves on each new floor
+
+    floors_in_memory = 3 # Visited floors kept unpacked, older ones are stored compressed
     
     constants = {
         'window_title': window_title,
-        'tileset': tileset,
         'screen_width': screen_width,
         'screen_height': screen_height,
         'block_size': block_size,
@@ -65,6 +63,40 @@ def get_constants():
         'room_max_size': room_max_size,
         'room_min_size': room_min_size,
         'max_rooms': max_rooms,
+        'cave_levels': cave_levels,
+        'cave_wall_chance': cave_wall_chance,
+        'cave_smoothing_steps': cave_smoothing_steps,
+        'max_fps': max_fps,
+        'idle_wait': idle_wait,
+        'autosave_turns': autosave_turns,
+        'floors_in_memory': floors_in_memory,
     }
 
-    return constants
+    return MappingProxyType(constants)
+
+@functools.lru_cache(maxsize = None)
+def get_tileset():
+    """Load the tcod tileset, only needed by the tcod backend.  Loaded once on first call."""
+    tileset = tcod.tileset.load_tilesheet(
+        "NewDFtest.png", 16, 16, tcod.tileset.CHARMAP_CP437
+    )
+
+    test_list = list(range(10001,11920))
+    
+    tileset2 = tcod.tileset.load_tilesheet(
+        "16x16.png", 32, 60, test_list
+    )
+
+    for i in range(10001,11920):
+        tileset.set_tile(i, tileset2.get_tile(i))
+
+    test3_list = list(range(12001, 12192))
+
+    tileset3 = tcod.tileset.load_tilesheet(
+        "wallstuff.png", 32, 10, test3_list
+    )
+
+    for i in range(12001, 12192):
+        tileset.set_tile(i, tileset3.get_tile(i))
+
+    return tileset
@@ -1,18 +1,25 @@
 import entity_factories
 import copy
+import prototypes
+
+def copy_prototype(prototype):
+    """Deep copy a prototype for the player, whose feats and spells change in play."""
+    entity = copy.deepcopy(prototype)
+    entity.prototype_id = prototypes.prototype_name(prototype)
+    return entity
 
 def get_player(class_race: str = None):
     if class_race == None:
-        player = copy.deepcopy(entity_factories.player)
+        player = copy_prototype(entity_factories.player)
         return player
 
     if class_race == 'Dwarf Fighter':
-        player = copy.deepcopy(entity_factories.dwarf_fighter)
+        player = copy_prototype(entity_factories.dwarf_fighter)
 
-        player_armor = copy.deepcopy(entity_factories.breastplate)
-        player_shield = copy.deepcopy(entity_factories.heavy_shield)
-        player_weapon = copy.deepcopy(entity_factories.dwarven_waraxe)
-        player_ranged = copy.deepcopy(entity_factories.composite_long_bow)
+        player_armor = copy_prototype(entity_factories.breastplate)
+        player_shield = copy_prototype(entity_factories.heavy_shield)
+        player_weapon = copy_prototype(entity_factories.dwarven_waraxe)
+        player_ranged = copy_prototype(entity_factories.composite_long_bow)
 
         player_armor.parent = player.inventory
         player_shield.parent = player.inventory
@@ -28,11 +35,11 @@ def get_player(class_race: str = None):
         return player
 
     if class_race == 'Human Fighter':
-        player = copy.deepcopy(entity_factories.human_fighter)
+        player = copy_prototype(entity_factories.human_fighter)
 
-        player_armor = copy.deepcopy(entity_factories.breastplate)
-        player_weapon = copy.deepcopy(entity_factories.greatsword)
-        player_ranged = copy.deepcopy(entity_factories.composite_long_bow)
+        player_armor = copy_prototype(entity_factories.breastplate)
+        player_weapon = copy_prototype(entity_factories.greatsword)
+        player_ranged = copy_prototype(entity_factories.composite_long_bow)
 
         player_armor.parent = player.inventory
         player_weapon.parent = player.inventory
@@ -46,12 +53,12 @@ def get_player(class_race: str = None):
         return player
 
     if class_race == 'Human Cleric':
-        player = copy.deepcopy(entity_factories.human_cleric)
+        player = copy_prototype(entity_factories.human_cleric)
 
-        player_armor = copy.deepcopy(entity_factories.breastplate)
-        player_shield = copy.deepcopy(entity_factories.heavy_shield)
-        player_weapon = copy.deepcopy(entity_factories.morningstar)
-        player_ranged = copy.deepcopy(entity_factories.javelin)
+        player_armor = copy_prototype(entity_factories.breastplate)
+        player_shield = copy_prototype(entity_factories.heavy_shield)
+        player_weapon = copy_prototype(entity_factories.morningstar)
+        player_ranged = copy_prototype(entity_factories.javelin)
 
         player_armor.parent = player.inventory
         player_shield.parent = player.inventory
@@ -67,11 +74,11 @@ def get_player(class_race: str = None):
         return player
 
     if class_race == 'Elf Wizard':
-        player = copy.deepcopy(entity_factories.elf_wizard)
+        player = copy_prototype(entity_factories.elf_wizard)
 
-        player_armor = copy.deepcopy(entity_factories.spellthief_armor)
-        player_weapon = copy.deepcopy(entity_factories.long_sword)
-        player_ranged = copy.deepcopy(entity_factories.composite_long_bow)
+        player_armor = copy_prototype(entity_factories.spellthief_armor)
+        player_weapon = copy_prototype(entity_factories.long_sword)
+        player_ranged = copy_prototype(entity_factories.composite_long_bow)
 
         player_armor.parent = player.inventory
         player_weapon.parent = player.inventory
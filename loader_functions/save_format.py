@@ -0,0 +1,594 @@
+"""
+Binary save format.
+
+A save is a container of named sections, each compressed on its own:
+
+    magic (8 bytes) | schema version (uint16) | section count (uint32)
+    then per section: name length (uint16) | name | data length (uint32) | zlib data
+
+Sections:
+    header          turn, dungeon level, player name, the levels of the saved floors and
+                    the number of messages sections
+    player          the player
+    floor:<level>   tiles as one byte per cell, visible and explored as bit buffers, the
+                    entities on the floor and the generation the floor was made from
+    engine          the rest of the Engine: recent messages, game world, timed effects
+    messages:<n>    the older messages, a chunk of them per section
+
+Loading only builds the player, the current floor and the engine.  Other floors are built
+when the player enters them and older messages when the history is opened, their sections
+are decompressed in the background meanwhile.
+
+Saving only pickles the player, the current floor and the engine.  The section of a floor
+the player has left stays the same until they return, so it is encoded once, off the main
+thread, and written again by later saves.  Message chunks are likewise compressed once.
+Floors and messages a loaded save hasn't loaded yet are written as they were read.
+
+Entities are stored as records holding the name of the entity_factories prototype they
+were copied from and only the attributes that differ from it.  References between
+entities, floors and the engine are written as ids and resolved when loaded.
+
+A floor with a generation is generated again from its seed when loaded.  Its section
+leaves out the tiles if they haven't changed, and entities it generated are stored as just
+their index while they haven't changed.  The floor keeps fingerprints of both from when it
+was generated to tell, see procgen.record_fingerprints.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple
+import copy
+import functools
+import heapq
+import io
+import pickle
+import struct
+import threading
+import zlib
+
+import numpy as np # type: ignore
+
+import procgen
+import prototypes
+import tile_types
+from engine import Engine
+from entity import Actor, Entity, EQUIPMENT_SLOTS
+from game_map import GameMap
+from message_log import Message
+from render_functions import PygameRenderer, Renderer
+from timed_effects import TimedEffects
+
+MAGIC = b"D20RLSAV"
+SCHEMA_VERSION = 5
+
+RECENT_MESSAGES = 20 # Messages loaded with the engine, enough to fill the message panel
+MESSAGE_CHUNK = 200 # Older messages per messages section
+
+# Tile kinds stored as a byte per cell.  A floor with any other tile keeps its raw tile array.
+TILE_KINDS = (tile_types.wall, tile_types.floor)
+
+# Attributes rebuilt on load instead of saved.
+ENGINE_REBUILT = ("renderer", "fov_key", "newly_visible")
+FLOOR_REBUILT = (
+    "engine", "entities", "entity_locations", "entity_keys", "blocked_by_entity", "entities_by_type",
+    "live_actors", "tiles", "visible", "explored", "map_layer", "map_layer_codes", "generated",
+    "generated_fingerprints", "tiles_fingerprint", "player_distances", "player_distances_key", "player_distance_search",
+)
+
+_missing = object()
+
+class ComponentDelta(dict):
+    """Changed attributes of a component, applied to the component of the rebuilt entity."""
+
+def same_value(value, base_value) -> bool:
+    if value is base_value:
+        return True
+    try:
+        return type(value) is type(base_value) and bool(value == base_value)
+    except Exception: # Arrays and other values without a plain truth value
+        return False
+
+def is_component(value, base_value) -> bool:
+    return (
+        type(value) is type(base_value) and hasattr(value, "__dict__")
+        and not isinstance(value, (Entity, GameMap, Engine, type))
+    )
+
+def state_delta(obj, base, skip: Tuple[str, ...], same: Callable = same_value) -> dict:
+    """Return the attributes of obj that differ from base, recursing into components."""
+    delta = {}
+    for name, value in vars(obj).items():
+        if name in skip:
+            continue
+        base_value = vars(base).get(name, _missing) if base is not None else _missing
+        if same(value, base_value):
+            continue
+        if is_component(value, base_value):
+            component_delta = state_delta(value, base_value, ("parent", "entity"), same)
+            if component_delta:
+                delta[name] = ComponentDelta(component_delta)
+        else:
+            delta[name] = value
+    return delta
+
+def apply_delta(obj, delta: dict) -> None:
+    for name, value in delta.items():
+        if isinstance(value, ComponentDelta):
+            apply_delta(obj.__dict__[name], value)
+        else:
+            obj.__dict__[name] = value
+
+def reattach_items(entity: Entity) -> None:
+    """Point carried and worn items back at their owner, parents aren't saved."""
+    if not isinstance(entity, Actor):
+        return
+    for item in entity.inventory.items:
+        item.parent = entity.inventory
+    for slot in EQUIPMENT_SLOTS:
+        item = getattr(entity.equipment, slot, None)
+        if item is not None and "parent" not in item.__dict__:
+            item.parent = entity.equipment
+
+def encode_tiles(tiles: np.ndarray) -> Tuple[str, bytes]:
+    codes = np.full(tiles.shape, 255, dtype = np.uint8, order = "F")
+    for code, kind in enumerate(TILE_KINDS):
+        codes[tiles == kind] = code
+    if (codes == 255).any():
+        return "raw", pickle.dumps(tiles, pickle.HIGHEST_PROTOCOL)
+    return "codes", codes.tobytes(order = "F")
+
+def decode_tiles(
+    encoded: Tuple[str, bytes], shape: Tuple[int, int], base_tiles: Optional[np.ndarray] = None
+) -> np.ndarray:
+    kind, data = encoded
+    if kind == "raw":
+        return pickle.loads(data)
+    if kind == "generated": # Unchanged since the floor was generated
+        return base_tiles.copy(order = "F")
+    codes = np.frombuffer(data, dtype = np.uint8).reshape(shape, order = "F")
+    return np.asfortranarray(np.asarray(TILE_KINDS)[codes])
+
+def encode_mask(mask: np.ndarray) -> bytes:
+    return np.packbits(mask.ravel(order = "F")).tobytes()
+
+def decode_mask(data: bytes, shape: Tuple[int, int]) -> np.ndarray:
+    bits = np.unpackbits(np.frombuffer(data, dtype = np.uint8), count = shape[0] * shape[1])
+    return bits.astype(bool).reshape(shape, order = "F")
+
+def decode_section(data: bytes) -> Any:
+    return pickle.loads(zlib.decompress(data))
+
+def regenerate_floor(generation: Dict[str, int]) -> GameMap:
+    """Generate a floor again from its generation, without touching the game in play."""
+    game_map, _ = procgen.generate_detached_floor(generation)
+    return game_map
+
+class Compressed(bytes):
+    """Section data that is already compressed, written to the container as it is."""
+
+def compress_section(data) -> bytes:
+    if callable(data): # A SavedFloor, encoded on the thread writing the container
+        data = data()
+    return data if isinstance(data, Compressed) else zlib.compress(data)
+
+def write_container(file: BinaryIO, sections: Dict[str, Any]) -> None:
+    file.write(MAGIC + struct.pack("<HI", SCHEMA_VERSION, len(sections)))
+    for name, data in sections.items():
+        name_bytes = name.encode()
+        data = compress_section(data)
+        file.write(struct.pack("<H", len(name_bytes)) + name_bytes + struct.pack("<I", len(data)) + data)
+
+def read_exact(file: BinaryIO, size: int) -> bytes:
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError("Save file is truncated.")
+    return data
+
+def read_container(file: BinaryIO) -> Dict[str, bytes]:
+    """
+    Return the sections of a save, still compressed.
+
+    Raises ValueError if the file isn't a complete save of this schema version.
+    """
+    if file.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a save file.")
+    version, count = struct.unpack("<HI", read_exact(file, 6))
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Save schema version {version} is not supported.")
+    sections = {}
+    for _ in range(count):
+        (name_length,) = struct.unpack("<H", read_exact(file, 2))
+        name = read_exact(file, name_length).decode()
+        (length,) = struct.unpack("<I", read_exact(file, 4))
+        sections[name] = read_exact(file, length)
+    return sections
+
+class SavePickler(pickle.Pickler):
+    def __init__(self, file, writer: SectionWriter):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.writer = writer
+
+    def persistent_id(self, obj):
+        return self.writer.persistent_id(obj)
+
+class SaveUnpickler(pickle.Unpickler):
+    def __init__(self, file, reader: SaveReader):
+        super().__init__(file)
+        self.reader = reader
+
+    def persistent_load(self, pid):
+        return self.reader.persistent_load(pid)
+
+class SectionWriter:
+    """
+    Pickles one save section, with records for the entities it is the first to refer to.
+
+    known holds the ids of the entities written by earlier sections of the same save.
+    Other sections only ever refer to the player, the first record of the player section,
+    so a floor section can be kept and written again by later saves.
+    """
+
+    def __init__(
+        self, engine: Engine, name: str, known: Optional[Dict[int, Tuple[str, int]]] = None,
+        floors: Iterable[GameMap] = (),
+    ):
+        self.engine = engine
+        self.name = name
+        self.entity_ids: Dict[int, Tuple[str, int]] = {} # id(entity) to (section, record index)
+        if name != "player":
+            self.entity_ids[id(engine.player)] = ("player", 0)
+        self.entity_ids.update(known or {})
+        self.records: List[Optional[bytes]] = []
+        self.pending: List[Entity] = [] # Entities given an id but not yet written
+        self.seen: List[Entity] = [] # Keeps written entities alive so their ids aren't reused
+        # id(entity) to (floor, index in generated, generated_indexes of the floor) for generated entities
+        self.generated: Dict[int, Tuple[GameMap, int, Dict[int, int]]] = {}
+        self.unchanged: Dict[int, bool] = {}
+        for game_map in floors:
+            self.add_generated(game_map)
+
+    def persistent_id(self, obj):
+        if obj is self.engine:
+            return ("engine",)
+        if isinstance(obj, GameMap):
+            return ("floor", obj.dungeon_level)
+        if isinstance(obj, Entity):
+            name = prototypes.prototype_name(obj)
+            if name is not None:
+                return ("prototype", name)
+            if id(obj) in self.generated and self.is_unchanged(obj):
+                game_map, index, _ = self.generated[id(obj)]
+                return ("generated", game_map.dungeon_level, index)
+            return ("entity",) + self.entity_id(obj)
+        return None
+
+    def add_generated(self, game_map: GameMap) -> None:
+        """Let the entities generated on game_map be written as their index while unchanged."""
+        if game_map.generation is None or game_map.generated_fingerprints is None:
+            return
+        indexes = procgen.generated_indexes(game_map)
+        for entity_id, index in indexes.items():
+            self.generated[entity_id] = (game_map, index, indexes)
+
+    def is_unchanged(self, entity: Entity) -> bool:
+        """Return True if a generated entity still matches its fingerprint from generation."""
+        if id(entity) not in self.unchanged:
+            game_map, index, indexes = self.generated[id(entity)]
+            self.unchanged[id(entity)] = (
+                procgen.entity_fingerprint(entity, indexes, self.engine) == game_map.generated_fingerprints[index]
+            )
+        return self.unchanged[id(entity)]
+
+    def entity_id(self, entity: Entity) -> Tuple[str, int]:
+        """Return the id of entity, queueing it to be written in this section."""
+        if id(entity) not in self.entity_ids:
+            self.entity_ids[id(entity)] = (self.name, len(self.records))
+            self.records.append(None)
+            self.pending.append(entity)
+            self.seen.append(entity)
+        return self.entity_ids[id(entity)]
+
+    def dumps(self, *objs) -> bytes:
+        buffer = io.BytesIO()
+        pickler = SavePickler(buffer, self)
+        for obj in objs:
+            pickler.dump(obj)
+        return buffer.getvalue()
+
+    def entity_record(self, entity: Entity) -> bytes:
+        base = prototypes.get_prototype(entity.prototype_id) if entity.prototype_id else None
+        # The player is a deep copy of its prototype, see player_init.
+        header = (None if base else type(entity), entity.prototype_id, entity is self.engine.player)
+        return self.dumps(header, state_delta(entity, base, ("parent",)))
+
+    def write_payload(self, *objs) -> bytes:
+        """Pickle objs, then the records of the entities first referred to by them."""
+        payload = self.dumps(*objs)
+        while self.pending:
+            entity = self.pending.pop()
+            self.records[self.entity_ids[id(entity)][1]] = self.entity_record(entity)
+        return payload
+
+    def write(self, *objs) -> bytes:
+        return pickle.dumps((self.write_payload(*objs), self.records), pickle.HIGHEST_PROTOCOL)
+
+    def write_floor(self, game_map: GameMap) -> bytes:
+        """Write a floor section, which also holds the generation of the floor if it has fingerprints."""
+        state = {name: value for name, value in vars(game_map).items() if name not in FLOOR_REBUILT}
+        generation = None
+        if game_map.generation is not None and game_map.generated_fingerprints is not None:
+            generation = game_map.generation
+        if generation is not None and procgen.tiles_fingerprint(game_map.tiles) == game_map.tiles_fingerprint:
+            state["tiles"] = ("generated", b"")
+        else:
+            state["tiles"] = encode_tiles(game_map.tiles)
+        state["visible"] = encode_mask(game_map.visible)
+        state["explored"] = encode_mask(game_map.explored)
+        payload = self.write_payload(state, list(game_map.entities))
+        return pickle.dumps((payload, self.records, generation), pickle.HIGHEST_PROTOCOL)
+
+class SavedFloor:
+    """
+    The section of a floor the player isn't on, kept and written again by every save until
+    the player goes back to the floor.
+
+    Made from the floor when the player leaves it, its packed bytes replace it once it is
+    packed.  The first save that needs the section encodes it on the thread writing the
+    save, see write_container, and keeps it.  A floor a loaded save hasn't loaded keeps
+    the section it was read from.
+    """
+
+    def __init__(
+        self, engine: Engine, game_map: Optional[GameMap] = None, packed: Optional[bytes] = None,
+        section: Optional[Compressed] = None,
+    ):
+        self.engine = engine
+        self.game_map = game_map
+        self.packed = packed
+        self.section = section
+        self.queued = False # Part of a save that may not be written yet
+        self.lock = threading.Lock()
+
+    def pack(self, packed: bytes) -> None:
+        """Hold on to the packed floor instead of the floor."""
+        with self.lock:
+            if self.section is None:
+                self.game_map, self.packed = None, packed
+
+    def release(self) -> None:
+        """
+        Let go of the floor as the player enters it.  Encodes it first if a save is still
+        waiting for it, the player is about to change it.
+        """
+        if self.queued:
+            self()
+
+    def __call__(self) -> Compressed:
+        with self.lock:
+            if self.section is None:
+                game_map = self.game_map
+                if game_map is None:
+                    game_map = self.engine.game_world.unpack_floor(self.packed)
+                writer = SectionWriter(self.engine, f"floor:{game_map.dungeon_level}", floors = (game_map,))
+                self.section = Compressed(zlib.compress(writer.write_floor(game_map)))
+                self.game_map = self.packed = None
+            return self.section
+
+class SaveWriter:
+    """
+    Turns an Engine into save sections.
+
+    Between turns it only pickles the player, the current floor and the engine.  The
+    other floors are SavedFloors, encoded once each and off the main thread, and the
+    older messages were compressed in chunks by earlier saves.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.writers: List[SectionWriter] = [] # Keep the entities they wrote alive
+
+    def section_writer(self, name: str, floors: Iterable[GameMap]) -> SectionWriter:
+        known: Dict[int, Tuple[str, int]] = {}
+        for writer in self.writers:
+            known.update(writer.entity_ids)
+        writer = SectionWriter(self.engine, name, known, floors)
+        self.writers.append(writer)
+        return writer
+
+    def archive_messages(self) -> None:
+        """Compress the messages before the recent ones in chunks, each once."""
+        message_log = self.engine.message_log
+        while len(message_log.messages) - message_log.archived >= MESSAGE_CHUNK + RECENT_MESSAGES:
+            chunk = message_log.messages[message_log.archived:message_log.archived + MESSAGE_CHUNK]
+            message_log.archive.append(Compressed(zlib.compress(pickle.dumps(chunk, pickle.HIGHEST_PROTOCOL))))
+            message_log.archived += MESSAGE_CHUNK
+
+    def engine_state(self) -> dict:
+        state = {name: value for name, value in vars(self.engine).items() if name not in ENGINE_REBUILT}
+        # Floors the player isn't on are floor sections, loaded when needed, see the header.
+        game_world = copy.copy(self.engine.game_world)
+        game_world.floors = OrderedDict()
+        game_world.packed_floors = {}
+        game_world.unloaded_floors = {}
+        game_world.saved_floors = {}
+        game_world.next_floor = None
+        state["game_world"] = game_world
+        # Archived messages are the messages sections.
+        message_log = copy.copy(self.engine.message_log)
+        message_log.messages = message_log.messages[message_log.archived:]
+        message_log.archive = []
+        message_log.archived = 0
+        state["message_log"] = message_log
+        # Entries for other floors are scheduled again when the player returns, see GameWorld.
+        timed_effects = TimedEffects()
+        timed_effects.heap = [
+            entry for entry in self.engine.timed_effects.heap
+            if self.engine.timed_effects.is_current(entry, self.engine.game_map)
+        ]
+        heapq.heapify(timed_effects.heap)
+        timed_effects.count = self.engine.timed_effects.count
+        state["timed_effects"] = timed_effects
+        return state
+
+    def write(self) -> Dict[str, Any]:
+        """
+        Return the sections, bytes to be compressed or Compressed, and SavedFloors which
+        write_container encodes.
+        """
+        engine = self.engine
+        game_world = engine.game_world
+        game_map = engine.game_map
+        self.archive_messages()
+        sections: Dict[str, Any] = {
+            "header": pickle.dumps({
+                "turn": engine.current_turn,
+                "dungeon_level": game_map.dungeon_level,
+                "player_name": engine.player.name,
+                "floors": sorted(game_world.saved_floors),
+                "message_chunks": len(engine.message_log.archive),
+            }),
+        }
+        floors = [game_map] + list(game_world.floors.values())
+        sections["player"] = self.section_writer("player", floors).write(engine.player)
+        name = f"floor:{game_map.dungeon_level}"
+        sections[name] = self.section_writer(name, [game_map]).write_floor(game_map)
+        sections["engine"] = self.section_writer("engine", floors).write(self.engine_state())
+        for dungeon_level, saved_floor in sorted(game_world.saved_floors.items()):
+            saved_floor.queued = True
+            sections[f"floor:{dungeon_level}"] = saved_floor
+        for index, chunk in enumerate(engine.message_log.archive):
+            sections[f"messages:{index}"] = chunk
+        return sections
+
+class SaveReader:
+    """
+    Rebuilds an Engine from save sections, decoding each section when first needed.
+
+    The reader stays alive after load_engine, the engine holds on to it to load the rest.
+    """
+
+    def __init__(self, sections: Dict[str, bytes]):
+        self.sections = sections
+        self.decoded: Dict[str, Any] = {}
+        self.prefetched: Dict[str, Future] = {} # Sections being decoded in the background
+        self.entities: Dict[Tuple[str, int], Entity] = {}
+        self.floors: Dict[int, GameMap] = {}
+        self.regenerated: Dict[int, GameMap] = {}
+        self.header: Dict[str, Any] = decode_section(sections["header"])
+        self.engine = Engine.__new__(Engine) # Filled in by load_engine
+
+    def section(self, name: str) -> Any:
+        """Return a decoded section, for most a pickled payload and its entity records."""
+        if name not in self.decoded:
+            future = self.prefetched.pop(name, None)
+            self.decoded[name] = future.result() if future is not None else decode_section(self.sections[name])
+        return self.decoded[name]
+
+    def prefetch(self, names: List[str]) -> None:
+        """Decompress and unpickle sections in the background, to build them faster later."""
+        executor = ThreadPoolExecutor(max_workers = 1, thread_name_prefix = "save-reader")
+        for name in names:
+            if name in self.sections and name not in self.decoded and name not in self.prefetched:
+                self.prefetched[name] = executor.submit(decode_section, self.sections[name])
+        executor.shutdown(wait = False)
+
+    def persistent_load(self, pid):
+        kind = pid[0]
+        if kind == "engine":
+            return self.engine
+        if kind == "floor":
+            return self.get_floor(pid[1])
+        if kind == "prototype":
+            return prototypes.get_prototype(pid[1])
+        if kind == "entity":
+            return self.get_entity(pid[1], pid[2])
+        if kind == "generated":
+            return self.get_generated(pid[1], pid[2])
+        raise pickle.UnpicklingError(f"Unknown persistent id {pid}")
+
+    def get_entity(self, section: str, index: int) -> Entity:
+        key = (section, index)
+        if key not in self.entities:
+            unpickler = SaveUnpickler(io.BytesIO(self.section(section)[1][index]), self)
+            cls, prototype_id, deep = unpickler.load()
+            if prototype_id is None:
+                entity = cls.__new__(cls)
+            elif deep:
+                entity = copy.deepcopy(prototypes.get_prototype(prototype_id))
+            else:
+                entity = prototypes.get_prototype(prototype_id).clone()
+            # Registered before its attributes are loaded, they may refer back to it.
+            self.entities[key] = entity
+            apply_delta(entity, unpickler.load())
+            reattach_items(entity)
+        return self.entities[key]
+
+    def get_regenerated(self, dungeon_level: int) -> GameMap:
+        """Return the floor generated again from the generation in its section."""
+        if dungeon_level not in self.regenerated:
+            generation = self.section(f"floor:{dungeon_level}")[2]
+            self.regenerated[dungeon_level] = regenerate_floor(generation)
+        return self.regenerated[dungeon_level]
+
+    def get_generated(self, dungeon_level: int, index: int) -> Entity:
+        """Return an entity of a floor that hasn't changed since the floor was generated."""
+        return self.get_regenerated(dungeon_level).generated[index]
+
+    def get_floor(self, dungeon_level: int) -> GameMap:
+        if dungeon_level not in self.floors:
+            payload, _, generation = self.section(f"floor:{dungeon_level}")
+            unpickler = SaveUnpickler(io.BytesIO(payload), self)
+            state = unpickler.load()
+            shape = (state["width"], state["height"])
+            game_map = GameMap(self.engine, state["width"], state["height"], state["dungeon_level"])
+            base_tiles = None
+            if generation is not None:
+                regenerated = self.get_regenerated(dungeon_level)
+                base_tiles = regenerated.tiles
+                game_map.generated = regenerated.generated
+                game_map.generated_fingerprints = regenerated.generated_fingerprints
+                game_map.tiles_fingerprint = regenerated.tiles_fingerprint
+            game_map.tiles = decode_tiles(state.pop("tiles"), shape, base_tiles)
+            game_map.visible = decode_mask(state.pop("visible"), shape)
+            game_map.explored = decode_mask(state.pop("explored"), shape)
+            game_map.__dict__.update(state)
+            self.floors[dungeon_level] = game_map
+            for entity in unpickler.load():
+                entity.parent = game_map
+                game_map.entities.add(entity)
+        return self.floors[dungeon_level]
+
+    def message_sections(self) -> List[str]:
+        return [f"messages:{index}" for index in range(self.header["message_chunks"])]
+
+    def load_history(self) -> List[Message]:
+        return [message for name in self.message_sections() for message in self.section(name)]
+
+    def load_engine(self, renderer: Optional[Renderer] = None) -> Engine:
+        """
+        Build the engine with the player and the current floor, leaving the rest unloaded.
+
+        renderer defaults to drawing with pygame, as for Engine.
+        """
+        floors = self.header["floors"]
+        self.get_floor(self.header["dungeon_level"])
+        payload, _ = self.section("engine")
+        self.engine.__dict__.update(SaveUnpickler(io.BytesIO(payload), self).load())
+        self.engine.renderer = renderer if renderer is not None else PygameRenderer()
+        self.engine.fov_key = None
+        self.engine.newly_visible = None
+        self.engine.game_world.unloaded_floors = {
+            dungeon_level: functools.partial(self.get_floor, dungeon_level) for dungeon_level in floors
+        }
+        # Saved again as they were read until they are loaded.
+        self.engine.game_world.saved_floors = {
+            dungeon_level: SavedFloor(self.engine, section = Compressed(self.sections[f"floor:{dungeon_level}"]))
+            for dungeon_level in floors
+        }
+        self.engine.message_log.archive = [Compressed(self.sections[name]) for name in self.message_sections()]
+        if self.header["message_chunks"]:
+            self.engine.message_log.unloaded_history = self.load_history
+        self.prefetch([f"floor:{dungeon_level}" for dungeon_level in floors] + self.message_sections())
+        self.engine.game_world.prepare_next_floor()
+        return self.engine
@@ -6,13 +6,15 @@ import tcod
 import tcod.event
 import pygame
 
-from typing import Iterable, Iterator
+from typing import Iterable, Iterator, List
 import colors
 import entity_factories
 import exceptions
 import input_handlers
+import presentation
 from loader_functions.initialize_new_game import get_constants # get_game_variables
 from loader_functions.player_init import get_player
+from loader_functions.autosave import autosaver
 from input_handlers import MainGameEventHandler, TownPortalEventHandler, SelectMonsterHandler, SummonMonsterHandler, SelectIndexHandler, ConeAreaAttackHandler
 import setup_game
 import render_functions
@@ -47,6 +49,44 @@ def is_square_handler(handler):
         return False
     
 
+def coalesce_events(events: Iterable[pygame.event.Event]) -> List[pygame.event.Event]:
+    """
+    Collapse each run of consecutive MOUSEMOTION events into the last one.
+
+    Handlers only read the current mouse position, so a sweep costs one redraw.  Every
+    other event is kept, in order.
+    """
+    coalesced = []
+    for event in events:
+        if event.type == pygame.MOUSEMOTION and coalesced and coalesced[-1].type == pygame.MOUSEMOTION:
+            coalesced[-1] = event
+        else:
+            coalesced.append(event)
+    return coalesced
+
+def render_frame(window: pygame.Surface, handler, mouse_target: bool) -> None:
+    """Draw the screen for the current handler, once per batch of events."""
+    if isinstance(handler, input_handlers.MainGameEventHandler):
+        handler.engine.render(window)
+    elif isinstance(handler, input_handlers.ConeAreaAttackHandler):
+        handler.engine.render(window)
+        handler.on_render(window, mouse_target = mouse_target)
+    elif is_square_handler(handler): #could alter on_render for all this
+        handler.engine.render(window)
+        handler.engine.render_target_square(window, mouse_target = mouse_target)
+        if not mouse_target:
+            render_functions.render_names_at_target_location(
+                screen = window, x = 25, y = constants['screen_height'] - constants['message_height'] - 1,
+                engine = handler.engine)
+    elif isinstance(handler, input_handlers.BaseEventHandler):
+        handler.on_render(window)
+        if not isinstance(handler, input_handlers.MainMenu): #Clumsy.  MainMenu doesn't have engine defined
+            handler.engine.message_log.render_messages(screen = window, #Needed so message are visible
+                    x = 40, y = 44, width = 40, height = 5,
+                    messages = handler.engine.message_log.messages)
+        # Menus redraw themselves without marking what they drew, present the whole window.
+        presentation.mark_all_dirty()
+
 def main() -> None:
 
     pygame.init()
@@ -59,56 +99,59 @@ def main() -> None:
     start_event = pygame.event.poll()
     handler: input_handlers.BaseEventHandler = input_handlers.MainMenu()
     handler.on_render(window)
+    presentation.present()
     handler = handler.handle_events(start_event)
     #handler.state = handler
     pygame.display.set_caption("Second try roguelike")
 
+    clock = pygame.time.Clock()
+    last_handler_type = type(handler)
     running = True
     while running:
-        for event in pygame.event.get():
+        # Sleep until there is input instead of polling, then take everything queued with it.
+        event = pygame.event.wait(constants['idle_wait'])
+        if event.type == pygame.NOEVENT:
+            continue
+        needs_render = False # Nothing to draw if the batch held no event the handler uses
+        mouse_target = False # Whether targeting follows the mouse or the keyboard cursor
+        for event in coalesce_events([event] + pygame.event.get()):
             if event.type == pygame.KEYDOWN:
                 try:
                     if isinstance(handler, input_handlers.BaseEventHandler):
                         handler = handler.handle_events(event) #Is handler
-                        if isinstance(handler, input_handlers.MainGameEventHandler):
-                            handler.engine.render(window)
-                        elif isinstance(handler, input_handlers.ConeAreaAttackHandler):
-                            handler.engine.render(window)
-                            handler.on_render(window, mouse_target = False)
-                        elif is_square_handler(handler): #could alter on_render for all this
-                            handler.engine.render(window)
-                            handler.engine.render_target_square(window, mouse_target = False)
-                            render_functions.render_names_at_target_location(
-                                screen = window, x = 25, y = constants['screen_height'] - constants['message_height'] - 1,
-                                engine = handler.engine)
-                        else:
-                            handler.on_render(window)
-                            if not isinstance(handler, input_handlers.MainMenu): #Clumsy.  MainMenu doesn't have engine defined
-                                handler.engine.message_log.render_messages(screen = window, #Needed so message are visible
-                                        x = 40, y = 44, width = 40, height = 5,
-                                        messages = handler.engine.message_log.messages)
                     else: #Is action
                         handler.perform()
                         handler = MainGameEventHandler(handler.engine) #Actions always return to MainGame
                         handler.engine.update_fov()
-                        handler.engine.render(window)
+                        autosaver.check(handler.engine)
                 except Exception: # Handle exceptions in game
                     traceback.print_exc() # Print error to stderr.
                     # The print the error to the message
+                needs_render = True
+                mouse_target = False
             elif event.type == pygame.MOUSEMOTION and isinstance(handler, input_handlers.MainGameEventHandler):
                 handler.ev_mousemotion(event)
-                handler.engine.render(window)
+                needs_render = True
             elif event.type == pygame.MOUSEMOTION and isinstance(handler, input_handlers.ConeAreaAttackHandler):
                 handler = handler.handle_events(event)
-                handler.engine.render(window)
-                handler.on_render(window, True)
+                needs_render = True
+                mouse_target = True
             elif event.type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION) and is_square_handler(handler):
                 handler = handler.handle_events(event)
-                handler.engine.render(window)
-                handler.engine.render_target_square(window, mouse_target = True)
-            pygame.display.update()
-            pygame.event.pump()
-        
+                needs_render = True
+                mouse_target = True
+        if needs_render:
+            try:
+                render_frame(window, handler, mouse_target)
+            except Exception:
+                traceback.print_exc()
+        if type(handler) is not last_handler_type:
+            # Menus and popups draw over the whole window, present it all when they open or close.
+            presentation.mark_all_dirty()
+            last_handler_type = type(handler)
+        presentation.present()
+        clock.tick(constants['max_fps']) # Caps redraws during mouse sweeps and held keys
+
     pygame.quit()
 
 if __name__ == "__main__":
@@ -7,7 +7,7 @@ import tcod
 import colors
 from engine import Engine
 import entity_factories
-from loader_functions.initialize_new_game import get_constants # get_game_variables
+from loader_functions.initialize_new_game import get_constants, get_tileset # get_game_variables
 from loader_functions.data_loaders import load_game
 from procgen import generate_dungeon
 
@@ -17,7 +17,7 @@ def main() -> None:
     with tcod.context.new_terminal(
         constants['screen_width'],
         constants['screen_height'],
-        tileset = constants['tileset'],
+        tileset = get_tileset(),
         title = constants['window_title'],
         vsync = True,
     ) as context:
@@ -1,15 +1,15 @@
-from typing import Iterable, List, Reversible, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Reversible, Tuple
 import textwrap
 
 import tcod
 import pygame
 
 import colors
+import presentation
+from text_rendering import text_to_screen
 
-def text_to_screen(screen, text = '', color = colors.white, size = 16, position = (0, 0), font = 'arial'):
-    font = pygame.font.SysFont(font, size)
-    image = font.render(text, True, color)
-    screen.blit(image, position)
+# Last message box drawn for each (width, height), with the key of the messages it shows.
+_message_boxes: Dict[Tuple[int, int], Tuple[tuple, Optional[pygame.Surface]]] = {}
 
 class Message:
     def __init__(self, text: str, fg: Tuple[int, int, int]):
@@ -27,6 +27,19 @@ class Message:
 class MessageLog:
     def __init__(self) -> None:
         self.messages: List[Message] = []
+        # Returns the older messages of a loaded save, which are only read when needed.
+        self.unloaded_history: Optional[Callable[[], List[Message]]] = None
+        # Older messages compressed in chunks by saves and how many leading messages they hold.
+        self.archive: List[bytes] = []
+        self.archived = 0
+
+    def load_history(self) -> None:
+        """Put the older messages of a loaded save back in front of the log."""
+        if self.unloaded_history is not None:
+            history = self.unloaded_history()
+            self.messages[:0] = history
+            self.archived += len(history) # Already in the archive
+            self.unloaded_history = None
 
     def add_message(
         self, text: str, fg: Tuple[int, int, int] = colors.white, *, stack: bool= True,
@@ -69,7 +82,24 @@ class MessageLog:
         """Render the messages provided.
         The `messages` are rendered starting at  the last message and working
         backwards.
+        The box is only rebuilt when a message was added or stacked since it was last drawn.
         """
+        key = (id(messages), len(messages), messages[-1].full_text if messages else None)
+        cached_key, mess_box = _message_boxes.get((width, height), (None, None))
+        if cached_key != key:
+            mess_box = cls.build_message_box(width, height, messages)
+            _message_boxes[(width, height)] = (key, mess_box)
+        if mess_box is not None:
+            presentation.mark_dirty(screen.blit(mess_box, (x*16, y*16)))
+
+    @classmethod
+    def build_message_box(
+        cls,
+        width: int,
+        height: int,
+        messages: Reversible[Message],
+    ) -> Optional[pygame.Surface]:
+        """Return the box of wrapped messages, or None if they don't fill it."""
         block_size = 16
         y_offset = height - 1
         mess_box = pygame.Surface((width*block_size, height*block_size))
@@ -79,6 +109,5 @@ class MessageLog:
                 text_to_screen(mess_box, text = line, position = (0*block_size, y_offset*block_size))
                 y_offset -= 1
                 if y_offset < 0:
-                    screen.blit(mess_box, (x*block_size, y*block_size))
-                    return # No more space to print messages.
-        
+                    return mess_box # No more space to print messages.
+        return None
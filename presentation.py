@@ -0,0 +1,38 @@
+from typing import List
+
+import pygame
+
+# Screen regions drawn this frame, pushed to the display by present().
+_dirty_rects: List[pygame.Rect] = []
+# Regions drawn over the map this frame (entities, target cursors).  They are presented
+# again next frame so whatever was drawn there is erased when it moves or goes away.
+_overlay_rects: List[pygame.Rect] = []
+_last_overlay_rects: List[pygame.Rect] = []
+_full_update = False
+
+def mark_dirty(rect: pygame.Rect) -> None:
+    """Present rect at the end of this frame."""
+    _dirty_rects.append(rect)
+
+def mark_overlay(rect: pygame.Rect) -> None:
+    """Present rect at the end of this frame and the next one."""
+    _overlay_rects.append(rect)
+
+def mark_all_dirty() -> None:
+    """Present the whole window at the end of this frame, for menus and screen changes."""
+    global _full_update
+    _full_update = True
+
+def present() -> None:
+    """Push the regions marked this frame to the display, in one update call."""
+    global _full_update, _overlay_rects, _last_overlay_rects
+    if _full_update:
+        pygame.display.update()
+    else:
+        rects = _dirty_rects + _overlay_rects + _last_overlay_rects
+        if rects:
+            pygame.display.update(rects)
+    _dirty_rects.clear()
+    _last_overlay_rects = _overlay_rects
+    _overlay_rects = []
+    _full_update = False
@@ -1,24 +1,32 @@
 from __future__ import annotations
 
+import hashlib
+import io
+import pickle
 import random
-from typing import Iterator, List, Tuple, TYPE_CHECKING
+from typing import Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
 
+import numpy as np # type: ignore
 import tcod
 import copy
 import random
 
+from loader_functions.initialize_new_game import get_constants
 from loader_functions.random_utils import from_dungeon_level, random_choice_from_dict
 from loader_functions.random_utils import random_choice_from_cr, random_monster_choice
 import entity_factories
+import prototypes
 from game_map import GameMap
 import tile_types
-from entity import Entity, Stairs
+from entity import Actor, Entity, Stairs, EQUIPMENT_SLOTS
 from render_order import RenderOrder
 from components.equipment import Equipment
 
 if TYPE_CHECKING:
     from engine import Engine
 
+constants = get_constants()
+
 class RectangularRoom:
     def __init__(self, x: int, y: int, width: int, height: int):
         self.x1 = x
@@ -38,6 +46,11 @@ class RectangularRoom:
         """Return the inner area of this room as a 2D array index."""
         return slice(self.x1 + 1, self.x2), slice(self.y1 + 1, self.y2)
 
+    @property
+    def outer(self) -> Tuple[slice, slice]:
+        """Return this room with its walls as a 2D array index, the cells intersects tests."""
+        return slice(self.x1, self.x2 + 1), slice(self.y1, self.y2 + 1)
+
     def intersects(self, other: RectangularRoom) -> bool:
         """Return True if this room overlaps with another RectangularRoom."""
         return (
@@ -47,111 +60,103 @@ class RectangularRoom:
             and self.y2 >= other.y1
         )    
 
-def place_entities(room: RectangularRoom, dungeon: GameMap) -> None:
+def place_entities(room: RectangularRoom, dungeon: GameMap, rng: random.Random) -> None:
     maximum_monsters = from_dungeon_level([[2, 1], [3, 4], [5, 6]], dungeon.dungeon_level)
     maximum_items = from_dungeon_level([[1, 1], [2, 4]], dungeon.dungeon_level)
 
-    number_of_monsters = random.randint(0, maximum_monsters)
-    number_of_items = random.randint(0, maximum_items)
+    number_of_monsters = rng.randint(0, maximum_monsters)
+    number_of_items = rng.randint(0, maximum_items)
 
     for i in range(number_of_monsters):
-        x = random.randint(room.x1 + 1, room.x2 - 1)
-        y = random.randint(room.y1 + 1, room.y2 - 1)
-
-        if not any(entity.x == x and entity.y == y for entity in dungeon.entities):
-            monster_choice = random_monster_choice(dungeon.dungeon_level)
-            
-            if monster_choice == 'orc':
-                new_orc = copy.deepcopy(entity_factories.orc)
-                orc_falchion = random_choice_from_dict({entity_factories.falchion_plus_one: 10,
-                                                       entity_factories.falchion_masterwork: 20,
-                                                       entity_factories.falchion: 70})
-                new_orc.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = orc_falchion, body = entity_factories.studded_leather))
-            elif monster_choice == 'human skeleton':
-                hskel_scimitar = random_choice_from_dict({entity_factories.scimitar_plus_one: 10,
-                                                         entity_factories.scimitar_masterwork: 20,
-                                                         entity_factories.scimitar: 70})
-                hskel_hshield = random_choice_from_dict({entity_factories.heavy_shield_plus_one: 5,
-                                                        entity_factories.heavy_shield_masterwork: 15,
-                                                        entity_factories.heavy_shield: 80})
-                new_hskel = copy.deepcopy(entity_factories.human_skeleton)
-                new_hskel.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = hskel_scimitar, off_hand = hskel_hshield))
-            elif monster_choice == 'goblin':
-                new_goblin = copy.deepcopy(entity_factories.goblin)
-                goblin_morn = random_choice_from_dict({entity_factories.morningstar_plus_one: 5,
-                                                      entity_factories.morningstar_masterwork: 10,
-                                                      entity_factories.morningstar: 85})
-                new_goblin.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = goblin_morn, body = entity_factories.leather_armor, off_hand = entity_factories.light_shield))
-            elif monster_choice == 'ogre':
-                new_ogre = copy.deepcopy(entity_factories.ogre)
-                ogre_club = random_choice_from_dict({entity_factories.greatclub_plus_one: 20,
-                                                      entity_factories.greatclub_masterwork: 30,
-                                                      entity_factories.greatclub: 50})
-                new_ogre.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = ogre_club, body = entity_factories.hide_armor, ranged = entity_factories.javelin))
-            elif monster_choice == 'troll':
-                new_troll = copy.deepcopy(entity_factories.troll)
-                new_troll.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(neck = entity_factories.amulet_of_na_plus_one))
-            elif monster_choice == 'hill giant':
-                new_hill_giant = copy.deepcopy(entity_factories.hill_giant)
-                hgiant_club = random_choice_from_dict({entity_factories.greatclub_plus_one: 35,
-                                    entity_factories.greatclub_masterwork: 45,
-                                    entity_factories.greatclub: 20})
-                new_hill_giant.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = hgiant_club, body = entity_factories.hide_armor))
-            elif monster_choice == 'ettin':
-                new_ettin = copy.deepcopy(entity_factories.ettin)
-                ettin_morn = random_choice_from_dict({entity_factories.morningstar_plus_one: 20,
-                                                      entity_factories.morningstar_masterwork: 30,
-                                                      entity_factories.morningstar: 50})
-                new_ettin.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = ettin_morn, ranged = entity_factories.javelin))
-            elif monster_choice == 'frost giant':
-                new_frost_giant = copy.deepcopy(entity_factories.frost_giant)
-                frgiant_axe = random_choice_from_dict({entity_factories.greataxe_plus_two: 20,
-                                                      entity_factories.greataxe_plus_one: 30,
-                                                      entity_factories.greataxe_masterwork: 30,
-                                                      entity_factories.greataxe: 20})
-                frgiant_cshirt = random_choice_from_dict({entity_factories.chain_shirt_plus_one: 30,
-                                                          entity_factories.chain_shirt_masterwork: 30,
-                                                          entity_factories.chain_shirt: 40})
-                new_frost_giant.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = frgiant_axe, body = frgiant_cshirt))
-            elif monster_choice == 'fire giant':
-                new_fire_giant = copy.deepcopy(entity_factories.fire_giant)
-                figiant_sword = random_choice_from_dict({entity_factories.greatsword_plus_two: 30,
-                                                         entity_factories.greatsword_plus_one: 40,
-                                                         entity_factories.greatsword_masterwork: 30})
-                new_fire_giant.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = figiant_sword, body = entity_factories.half_plate))
-            elif monster_choice == 'manticore':
-                new_manticore = copy.deepcopy(entity_factories.manticore)
-                new_manticore.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment())
-            elif monster_choice == 'young red dragon':
-                new_young_red_dragon = copy.deepcopy(entity_factories.red_dragon_young)
-                new_young_red_dragon.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment())
-            elif monster_choice == 'bison':
-                entity_factories.bison.spawn(dungeon, x, y)
-            elif monster_choice == 'boar':
-                new_boar = copy.deepcopy(entity_factories.boar)
-                new_boar.spawn(dungeon, x, y)
-            elif monster_choice == 'camel':
-                entity_factories.camel.spawn(dungeon, x, y)
-            elif monster_choice == 'crocodile':
-                entity_factories.crocodile.spawn(dungeon, x, y)
-            elif monster_choice == 'hawk':
-                entity_factories.hawk.spawn(dungeon, x, y)
-            elif monster_choice == 'hyena':
-                entity_factories.hyena.spawn(dungeon, x, y)
-            elif monster_choice == 'snake':
-                entity_factories.snake.spawn(dungeon, x, y)
-            elif monster_choice == 'wolf':
-                entity_factories.wolf.spawn(dungeon, x, y)
-            else:
-                print('missing monster: ' + monster_choice)
+        x = rng.randint(room.x1 + 1, room.x2 - 1)
+        y = rng.randint(room.y1 + 1, room.y2 - 1)
+
+        if not dungeon.get_entities_at_location(x, y):
+            spawn_monster(dungeon, x, y, rng)
+
+def spawn_monster(dungeon: GameMap, x: int, y: int, rng: random.Random) -> None:
+    """Spawn a random monster for the dungeon level at x, y, with its equipment."""
+    monster_choice = random_monster_choice(dungeon.dungeon_level, rng)
+    
+    if monster_choice == 'orc':
+        orc_falchion = random_choice_from_dict({entity_factories.falchion_plus_one: 10,
+                                               entity_factories.falchion_masterwork: 20,
+                                               entity_factories.falchion: 70}, rng)
+        entity_factories.orc.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = orc_falchion, body = entity_factories.studded_leather), rng = rng)
+    elif monster_choice == 'human skeleton':
+        hskel_scimitar = random_choice_from_dict({entity_factories.scimitar_plus_one: 10,
+                                                 entity_factories.scimitar_masterwork: 20,
+                                                 entity_factories.scimitar: 70}, rng)
+        hskel_hshield = random_choice_from_dict({entity_factories.heavy_shield_plus_one: 5,
+                                                entity_factories.heavy_shield_masterwork: 15,
+                                                entity_factories.heavy_shield: 80}, rng)
+        entity_factories.human_skeleton.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = hskel_scimitar, off_hand = hskel_hshield), rng = rng)
+    elif monster_choice == 'goblin':
+        goblin_morn = random_choice_from_dict({entity_factories.morningstar_plus_one: 5,
+                                              entity_factories.morningstar_masterwork: 10,
+                                              entity_factories.morningstar: 85}, rng)
+        entity_factories.goblin.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = goblin_morn, body = entity_factories.leather_armor, off_hand = entity_factories.light_shield), rng = rng)
+    elif monster_choice == 'ogre':
+        ogre_club = random_choice_from_dict({entity_factories.greatclub_plus_one: 20,
+                                              entity_factories.greatclub_masterwork: 30,
+                                              entity_factories.greatclub: 50}, rng)
+        entity_factories.ogre.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = ogre_club, body = entity_factories.hide_armor, ranged = entity_factories.javelin), rng = rng)
+    elif monster_choice == 'troll':
+        entity_factories.troll.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(neck = entity_factories.amulet_of_na_plus_one), rng = rng)
+    elif monster_choice == 'hill giant':
+        hgiant_club = random_choice_from_dict({entity_factories.greatclub_plus_one: 35,
+                            entity_factories.greatclub_masterwork: 45,
+                            entity_factories.greatclub: 20}, rng)
+        entity_factories.hill_giant.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = hgiant_club, body = entity_factories.hide_armor), rng = rng)
+    elif monster_choice == 'ettin':
+        ettin_morn = random_choice_from_dict({entity_factories.morningstar_plus_one: 20,
+                                              entity_factories.morningstar_masterwork: 30,
+                                              entity_factories.morningstar: 50}, rng)
+        entity_factories.ettin.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = ettin_morn, ranged = entity_factories.javelin), rng = rng)
+    elif monster_choice == 'frost giant':
+        frgiant_axe = random_choice_from_dict({entity_factories.greataxe_plus_two: 20,
+                                              entity_factories.greataxe_plus_one: 30,
+                                              entity_factories.greataxe_masterwork: 30,
+                                              entity_factories.greataxe: 20}, rng)
+        frgiant_cshirt = random_choice_from_dict({entity_factories.chain_shirt_plus_one: 30,
+                                                  entity_factories.chain_shirt_masterwork: 30,
+                                                  entity_factories.chain_shirt: 40}, rng)
+        entity_factories.frost_giant.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = frgiant_axe, body = frgiant_cshirt), rng = rng)
+    elif monster_choice == 'fire giant':
+        figiant_sword = random_choice_from_dict({entity_factories.greatsword_plus_two: 30,
+                                                 entity_factories.greatsword_plus_one: 40,
+                                                 entity_factories.greatsword_masterwork: 30}, rng)
+        entity_factories.fire_giant.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(main_hand = figiant_sword, body = entity_factories.half_plate), rng = rng)
+    elif monster_choice == 'manticore':
+        entity_factories.manticore.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(), rng = rng)
+    elif monster_choice == 'young red dragon':
+        entity_factories.red_dragon_young.spawn_w_items(dungeon, x, y, inventory = [], equipment = Equipment(), rng = rng)
+    elif monster_choice == 'bison':
+        entity_factories.bison.spawn(dungeon, x, y)
+    elif monster_choice == 'boar':
+        entity_factories.boar.spawn(dungeon, x, y)
+    elif monster_choice == 'camel':
+        entity_factories.camel.spawn(dungeon, x, y)
+    elif monster_choice == 'crocodile':
+        entity_factories.crocodile.spawn(dungeon, x, y)
+    elif monster_choice == 'hawk':
+        entity_factories.hawk.spawn(dungeon, x, y)
+    elif monster_choice == 'hyena':
+        entity_factories.hyena.spawn(dungeon, x, y)
+    elif monster_choice == 'snake':
+        entity_factories.snake.spawn(dungeon, x, y)
+    elif monster_choice == 'wolf':
+        entity_factories.wolf.spawn(dungeon, x, y)
+    else:
+        print('missing monster: ' + monster_choice)
 
 def tunnel_between(
-    start: Tuple[int, int], end: Tuple[int, int]
+    start: Tuple[int, int], end: Tuple[int, int], rng: random.Random
 ) -> Iterator[Tuple[int, int]]:
     """Return an L-shaped tunnel between these two points."""
     x1, y1 = start
     x2, y2 = end
-    if random.random() < 0.5: # 50% chance
+    if rng.random() < 0.5: # 50% chance
         # Move horizontally, then vertically.
         corner_x, corner_y = x2, y1
     else:
@@ -164,6 +169,21 @@ def tunnel_between(
     for x, y in tcod.los.bresenham((corner_x, corner_y), (x2, y2)).tolist():
         yield x, y
 
+def carve_tunnel(
+    dungeon: GameMap, start: Tuple[int, int], end: Tuple[int, int], rng: random.Random
+) -> None:
+    """Dig the same L-shaped tunnel as tunnel_between, a slice per leg instead of a cell at a time."""
+    x1, y1 = start
+    x2, y2 = end
+    if rng.random() < 0.5: # 50% chance
+        # Move horizontally, then vertically.
+        dungeon.tiles[min(x1, x2):max(x1, x2) + 1, y1] = tile_types.floor
+        dungeon.tiles[x2, min(y1, y2):max(y1, y2) + 1] = tile_types.floor
+    else:
+        # Move vertically, then horizontally.
+        dungeon.tiles[x1, min(y1, y2):max(y1, y2) + 1] = tile_types.floor
+        dungeon.tiles[min(x1, x2):max(x1, x2) + 1, y2] = tile_types.floor
+
 def place_holder(
     max_rooms: int,
     room_min_size: int,
@@ -258,30 +278,36 @@ def generate_dungeon(
     engine: Engine,
     dungeon_level: int,
     stairs: int,
+    rng: Optional[random.Random] = None,
 ) -> GameMap:
-    """Generate a new dungeon map."""
+    """Generate a new dungeon map, the same map each time for an rng in the same state."""
+    if rng is None:
+        rng = random.Random()
     player = engine.player
     dungeon = GameMap(engine, map_width, map_height, dungeon_level, entities = [player], stairs = stairs)
 
     rooms: List[RectangularRoom] = []
+    # Cells covered by the rooms so far, walls included.
+    occupied = np.full((map_width, map_height), fill_value = False, order = "F")
 
     center_of_last_room_x = None
     center_of_last_room_y = None
 
     for r in range(max_rooms):
-        room_width = random.randint(room_min_size, room_max_size)
-        room_height = random.randint(room_min_size, room_max_size)
+        room_width = rng.randint(room_min_size, room_max_size)
+        room_height = rng.randint(room_min_size, room_max_size)
 
-        x = random.randint(0, dungeon.width - room_width - 1)
-        y = random.randint(0, dungeon.height - room_height - 1)
+        x = rng.randint(0, dungeon.width - room_width - 1)
+        y = rng.randint(0, dungeon.height - room_height - 1)
 
         # "RectangularRoom" class makes rectangles easier to work with
         new_room = RectangularRoom(x, y, room_width, room_height)
 
-        # Run through the other rooms and see if they intersect with this one.
-        if any(new_room.intersects(other_room) for other_room in rooms):
+        # A room intersects another exactly when it covers one of its cells.
+        if occupied[new_room.outer].any():
             continue # This room vdfm intersects, so go to the next attempt.
         # If there are no intersections then the room is valid.
+        occupied[new_room.outer] = True
 
         center_of_last_room_x = int(x + room_width / 2)
         center_of_last_room_y = int(y + room_height / 2)
@@ -299,10 +325,9 @@ def generate_dungeon(
                     entity_factories.stairs.spawn(dungeon, player.x, player.y)
         else: # All rooms after the first.
             # Dig out a tunnel between this room and the previous one.
-            for x, y in tunnel_between(rooms[-1].center, new_room.center):
-                dungeon.tiles[x, y] = tile_types.floor
+            carve_tunnel(dungeon, rooms[-1].center, new_room.center, rng)
 
-        place_entities(new_room, dungeon)
+        place_entities(new_room, dungeon, rng)
 
         # Finally, append the new room to the list.
         rooms.append(new_room)
@@ -315,6 +340,119 @@ def generate_dungeon(
         
     return dungeon
 
+def wall_counts(walls: np.ndarray) -> np.ndarray:
+    """Return how many walls are in the 3x3 block around each cell, outside the map counting as wall."""
+    padded = np.pad(walls, 1, constant_values = True).astype(np.int8)
+    width, height = walls.shape
+    counts = np.zeros(walls.shape, dtype = np.int8)
+    for dx in (0, 1, 2):
+        for dy in (0, 1, 2):
+            counts += padded[dx:dx + width, dy:dy + height]
+    return counts
+
+def largest_region(open_cells: np.ndarray) -> np.ndarray:
+    """
+    Return the largest 4-connected region of open_cells as a mask.
+
+    Labels runs of open cells down each column instead of single cells, joining runs
+    that overlap in neighbouring columns, so the Python work scales with the runs.
+    """
+    width, height = open_cells.shape
+    steps = np.diff(np.pad(open_cells, ((0, 0), (1, 1))).astype(np.int8), axis = 1)
+    run_x, run_start = np.nonzero(steps == 1)
+    _, run_end = np.nonzero(steps == -1) # Exclusive, pairs up with the starts
+    if not len(run_x):
+        return open_cells.copy()
+
+    parents = list(range(len(run_x)))
+    def find(run: int) -> int:
+        while parents[run] != run:
+            parents[run] = parents[parents[run]]
+            run = parents[run]
+        return run
+
+    column_runs = np.searchsorted(run_x, np.arange(width + 1))
+    for x in range(width - 1):
+        i, i_end = column_runs[x], column_runs[x + 1]
+        j, j_end = column_runs[x + 1], column_runs[x + 2]
+        while i < i_end and j < j_end: # Walk both columns' runs down together
+            if run_start[i] < run_end[j] and run_start[j] < run_end[i]:
+                parents[find(i)] = find(j)
+            if run_end[i] < run_end[j]:
+                i += 1
+            else:
+                j += 1
+
+    roots = np.array([find(run) for run in range(len(run_x))])
+    sizes = np.bincount(roots, weights = run_end - run_start)
+    keep = roots == np.argmax(sizes)
+    # Mark each kept run with +1 at its start and -1 at its end, then sum down the columns.
+    marks = np.zeros((width, height + 1), dtype = np.int32)
+    np.add.at(marks, (run_x[keep], run_start[keep]), 1)
+    np.add.at(marks, (run_x[keep], run_end[keep]), -1)
+    return np.cumsum(marks, axis = 1)[:, :height] > 0
+
+def generate_cave(
+    max_rooms: int,
+    room_min_size: int,
+    room_max_size: int,
+    map_width: int,
+    map_height: int,
+    engine: Engine,
+    dungeon_level: int,
+    stairs: int,
+    rng: Optional[random.Random] = None,
+) -> GameMap:
+    """
+    Generate a cave floor by smoothing random walls with a cellular automaton.
+
+    Only the largest connected cave is kept.  Stairs are placed like generate_dungeon's,
+    the way back under the player and the way on at the far end of the cave.  max_rooms
+    areas of monsters are placed, the room sizes are unused.
+    """
+    if rng is None:
+        rng = random.Random()
+    player = engine.player
+    dungeon = GameMap(engine, map_width, map_height, dungeon_level, entities = [player], stairs = stairs)
+
+    cells = np.random.default_rng(rng.getrandbits(64))
+    while True:
+        walls = cells.random((map_width, map_height)) < constants['cave_wall_chance']
+        for _ in range(constants['cave_smoothing_steps']):
+            walls = wall_counts(walls) >= 5 # The 4-5 rule
+        walls[[0, -1], :] = True
+        walls[:, [0, -1]] = True
+        cave = largest_region(~walls)
+        if cave.sum() >= map_width * map_height // 4: # Try again if the cave is too small
+            break
+
+    dungeon.tiles[cave] = tile_types.floor
+    open_xs, open_ys = np.nonzero(cave)
+
+    start = rng.randrange(len(open_xs))
+    player.place(int(open_xs[start]), int(open_ys[start]), dungeon)
+    if dungeon.dungeon_level > 0:
+        if dungeon.stairs == 1: #went down stairs to get here
+            entity_factories.up_stairs.spawn(dungeon, player.x, player.y)
+        else: #went up stairs to get here
+            entity_factories.stairs.spawn(dungeon, player.x, player.y)
+
+    maximum_monsters = from_dungeon_level([[2, 1], [3, 4], [5, 6]], dungeon.dungeon_level)
+    for _ in range(max_rooms):
+        for i in range(rng.randint(0, maximum_monsters)):
+            cell = rng.randrange(len(open_xs))
+            x, y = int(open_xs[cell]), int(open_ys[cell])
+            if not dungeon.get_entities_at_location(x, y):
+                spawn_monster(dungeon, x, y, rng)
+
+    end = np.argmax((open_xs - player.x) ** 2 + (open_ys - player.y) ** 2)
+    if dungeon.stairs == 1: #went down stairs to get here
+        entity_factories.stairs.spawn(dungeon, int(open_xs[end]), int(open_ys[end]))
+    else: #went up stairs to get here
+        entity_factories.up_stairs.spawn(dungeon, int(open_xs[end]), int(open_ys[end]))
+
+    return dungeon
+
 def generate_town(
     engine: Engine,
     max_rooms: int = 0,
@@ -346,3 +484,129 @@ def generate_town(
     entity_factories.misc_shop.spawn(dungeon, 25, 15)
 
     return dungeon
+
+def generate_floor(engine: Engine, generation: Dict[str, int]) -> GameMap:
+    """
+    Generate the floor described by generation, see GameWorld.floor_generation.
+
+    The map is the same every time for the same generation, so a saved floor only needs
+    the generation and what changed since.  The map remembers the generation, what it
+    generated and fingerprints of those entities and the tiles to tell what changed.
+    """
+    rng = random.Random(generation["seed"])
+    generate = generate_cave if generation.get("cave") else generate_dungeon
+    if generation["dungeon_level"] == 0:
+        game_map = generate_town(
+            engine = engine,
+            max_rooms = generation["max_rooms"],
+            room_min_size = generation["room_min_size"],
+            room_max_size = generation["room_max_size"],
+            map_width = generation["map_width"],
+            map_height = generation["map_height"],
+            dungeon_level = 0,
+        )
+    else:
+        game_map = generate(
+            max_rooms = generation["max_rooms"],
+            room_min_size = generation["room_min_size"],
+            room_max_size = generation["room_max_size"],
+            map_width = generation["map_width"],
+            map_height = generation["map_height"],
+            engine = engine,
+            dungeon_level = generation["dungeon_level"],
+            stairs = generation["stairs"],
+            rng = rng,
+        )
+    game_map.generation = generation
+    game_map.generated = generated_entities(game_map, engine.player)
+    record_fingerprints(game_map)
+    return game_map
+
+def generate_detached_floor(generation: Dict[str, int]) -> Tuple[GameMap, Tuple[int, int]]:
+    """
+    Generate a floor without touching the game in play, so it can run on a worker thread.
+
+    A stand-in takes the player's place, so monsters are placed as they are around the
+    player.  Returns the map, with no player or engine, and where the player arrives.
+    """
+    from engine import Engine
+
+    stand_in = Engine.__new__(Engine)
+    stand_in.player = Entity(name = "<Player>")
+    game_map = generate_floor(stand_in, generation)
+    game_map.entities.remove(stand_in.player)
+    game_map.engine = None
+    return game_map, (stand_in.player.x, stand_in.player.y)
+
+class FingerprintPickler(pickle.Pickler):
+    """Pickles the attributes of an entity, writing the maps, engine and entities it refers to as ids."""
+
+    def __init__(self, file, indexes: Dict[int, int], engine: Optional[Engine]):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.indexes = indexes
+        self.engine = engine
+
+    def persistent_id(self, obj):
+        if isinstance(obj, GameMap):
+            return "map"
+        if obj is self.engine:
+            return "engine"
+        if isinstance(obj, Entity):
+            if id(obj) in self.indexes:
+                return ("generated", self.indexes[id(obj)])
+            name = prototypes.prototype_name(obj)
+            return ("prototype", name) if name is not None else ("entity", id(obj))
+        return None
+
+def generated_indexes(game_map: GameMap) -> Dict[int, int]:
+    """Return the index in game_map.generated of each generated entity, by id."""
+    return {id(entity): index for index, entity in enumerate(game_map.generated)}
+
+def entity_fingerprint(entity: Entity, indexes: Dict[int, int], engine: Optional[Engine]) -> bytes:
+    """Return a digest of the attributes of a generated entity, see generated_indexes."""
+    buffer = io.BytesIO()
+    FingerprintPickler(buffer, indexes, engine).dump(vars(entity))
+    return hashlib.blake2b(buffer.getvalue(), digest_size = 16).digest()
+
+def tiles_fingerprint(tiles: np.ndarray) -> bytes:
+    return hashlib.blake2b(tiles.tobytes(order = "F"), digest_size = 16).digest()
+
+def record_fingerprints(game_map: GameMap) -> None:
+    """
+    Fingerprint the generated entities and the tiles as they are now, freshly generated.
+
+    Saves compare against these to store what hasn't changed as just the generation.
+    """
+    indexes = generated_indexes(game_map)
+    game_map.generated_fingerprints = [
+        entity_fingerprint(entity, indexes, game_map.engine) for entity in game_map.generated
+    ]
+    game_map.tiles_fingerprint = tiles_fingerprint(game_map.tiles)
+
+def generated_entities(game_map: GameMap, player: Entity) -> List[Entity]:
+    """
+    Return the entities generated on game_map in a fixed order, with the items they carry.
+
+    The order only depends on how the floor was generated, so an entity's index in the
+    list finds it again in a regenerated copy of the floor.
+    """
+    generated: List[Entity] = []
+    seen = set()
+    def add(entity: Entity) -> None:
+        if id(entity) not in seen:
+            seen.add(id(entity))
+            generated.append(entity)
+
+    for entity in sorted(
+        (entity for entity in game_map.entities if entity is not player),
+        key = lambda entity: (entity.x, entity.y, entity.name),
+    ):
+        add(entity)
+        if isinstance(entity, Actor):
+            for item in entity.inventory.items:
+                add(item)
+            for slot in EQUIPMENT_SLOTS:
+                item = getattr(entity.equipment, slot, None)
+                if item is not None:
+                    add(item)
+    return generated
@@ -0,0 +1,34 @@
+"""
+Lookup of the entity prototypes defined in entity_factories by their variable name.
+
+Spawned entities remember the name of the prototype they were cloned from, so saves can
+store an entity as that name plus what changed.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+import functools
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+@functools.lru_cache(maxsize = None)
+def _registry() -> Tuple[Dict[str, Entity], Dict[int, str]]:
+    # Imported here, entity_factories imports entity which imports this module.
+    import entity_factories
+    from entity import Entity
+
+    by_name = {}
+    by_id = {}
+    for name, value in vars(entity_factories).items():
+        if isinstance(value, Entity) and id(value) not in by_id:
+            by_name[name] = value
+            by_id[id(value)] = name
+    return by_name, by_id
+
+def get_prototype(name: str) -> Entity:
+    return _registry()[0][name]
+
+def prototype_name(entity: Entity) -> Optional[str]:
+    """Return the name of entity if it is itself a prototype, None for spawned entities."""
+    return _registry()[1].get(id(entity))
@@ -4,6 +4,8 @@ import os
 
 import numpy as np # type: ignore
 
+import sprites
+
 # Tile graphics structured type compatible with Console.tiles_rgb.
 graphic_dt = np.dtype(
     [
@@ -31,11 +33,49 @@ tile_dt = np.dtype(
     ]
 )
 
-walls = pygame.image.load(os.path.join('Dawnlike', 'Objects', 'Wall.png'))
-#walls.convert()
-floors = pygame.image.load(os.path.join('Dawnlike', 'Objects', 'Floor.png'))
-#floors.convert()
-tiles = pygame.image.load(os.path.join('Dawnlike', 'Objects', 'Tile.png'))
+# Sheets the map tiles are cut from, loaded on first render so a headless engine never loads them.
+walls = os.path.join('Dawnlike', 'Objects', 'Wall.png')
+floors = os.path.join('Dawnlike', 'Objects', 'Floor.png')
+tiles = os.path.join('Dawnlike', 'Objects', 'Tile.png')
+
+# Field of view states a map cell can be drawn in.
+UNSEEN = 0
+EXPLORED = 1
+VISIBLE = 2
+
+# Sheet regions layered into one map cell, bottom layer first, keyed by (fov state, is floor).
+TILE_LAYERS = {
+    (UNSEEN, False): [(tiles, (0, 32))],
+    (UNSEEN, True): [(tiles, (0, 32))],
+    (EXPLORED, False): [(walls, (8*16, 0)), (walls, (3*16, 24*16))],
+    (EXPLORED, True): [(floors, (9*16, 0)), (floors, (4*16, 13*16))],
+    (VISIBLE, False): [(walls, (3*16, 18*16))],
+    (VISIBLE, True): [(floors, (64, 64))],
+}
+
+_tile_images = {}
+
+def tile_code(state, is_floor):
+    """
+    Pack a fov state and floor flag into the code used by the map layer cache.
+
+    Works on plain values as well as whole numpy arrays of them.
+    """
+    return state * 2 + is_floor
+
+def get_tile_images() -> dict:
+    """
+    Return the composited 16x16 image for each tile code.
+
+    Built once, on first use, since converting to the display format needs a display.
+    """
+    if not _tile_images:
+        for (state, is_floor), layers in TILE_LAYERS.items():
+            image = pygame.Surface((16, 16), pygame.SRCALPHA)
+            for sheet, (x, y) in layers:
+                image.blit(sprites.get_sheet(sheet), (0, 0), (x, y, 16, 16))
+            _tile_images[tile_code(state, is_floor)] = image.convert_alpha()
+    return _tile_images
 
 def new_ptile(
     *,
@@ -43,7 +83,7 @@ def new_ptile(
     transparent: int,
     dark: pgraphic_dt,
     light: pgraphic_dt,
-    graphic: pygame.Surface,
+    graphic: str,
 ) -> np.ndarray:
     """Helper function for defining individual tile types """
     return np.array((walkable, transparent, dark, light), dtype = tile_dt)
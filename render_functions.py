@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from typing import TYPE_CHECKING
+import functools
 
 import colors
+import presentation
 import pygame
-import traceback
-import os
 from loader_functions.initialize_new_game import get_constants
+from text_rendering import text_to_screen
 
 if TYPE_CHECKING:
     from tcod import Console
@@ -16,34 +17,47 @@ if TYPE_CHECKING:
 constants = get_constants()
 block_size = constants['block_size']
 
-def text_to_screen(screen, text = '', color = colors.white, size = 16, position = (0, 0), font = 'arial'):
-    font = pygame.font.SysFont(font, size)
-    image = font.render(text, True, color)
-    screen.blit(image, position)
-
 def get_names_at_location(x: int, y: int, game_map: GameMap) -> str:
     if not game_map.in_bounds(x, y) or not game_map.visible[x, y]:
         return ""
 
     names = ", ".join(
-        entity.name for entity in game_map.entities if entity.x == x and entity.y == y
+        entity.name for entity in game_map.get_entities_at_location(x, y)
     )
 
     return names.capitalize()
 
 def render_bar(main_screen: pygame.display, engine: Engine) -> None:
-    
-    current_mana = engine.player.battler.mana
-    maximum_mana = engine.player.battler.max_mana
-    current_hp = engine.player.battler.hp
-    maximum_hp = engine.player.battler.max_hp
+    """Draw the status bar, reusing the last bar surface if none of its values changed."""
+    bar_surf = build_bar_surface(
+        current_mana = engine.player.battler.mana,
+        maximum_mana = engine.player.battler.max_mana,
+        current_hp = engine.player.battler.hp,
+        maximum_hp = engine.player.battler.max_hp,
+        dungeon_level = engine.game_map.dungeon_level,
+        xp = engine.player.level.current_xp,
+        xp_to_level = engine.player.level.experience_to_next_level,
+        player_level = engine.player.level.current_level,
+        player_gold = engine.player.battler.gold,
+        game_turn = engine.current_turn,
+    )
+    presentation.mark_dirty(main_screen.blit(bar_surf, (0, 44*block_size)))
+
+@functools.lru_cache(maxsize = 1)
+def build_bar_surface(
+    current_mana: int,
+    maximum_mana: int,
+    current_hp: int,
+    maximum_hp: int,
+    dungeon_level: int,
+    xp: int,
+    xp_to_level: int,
+    player_level: int,
+    player_gold: int,
+    game_turn: int,
+) -> pygame.Surface:
+    """Build the status bar surface.  The last one built is cached by its values."""
     total_width = constants['bar_width']
-    dungeon_level = engine.game_map.dungeon_level
-    xp = engine.player.level.current_xp
-    xp_to_level = engine.player.level.experience_to_next_level
-    player_level = engine.player.level.current_level
-    player_gold = engine.player.battler.gold
-    game_turn = engine.current_turn
     height = 6
     bar_surf = pygame.Surface((total_width*block_size, height*block_size))
 
@@ -78,7 +92,7 @@ def render_bar(main_screen: pygame.display, engine: Engine) -> None:
                    position = (0*block_size, 3*block_size))
     text_to_screen(bar_surf, text = f"Turn: {game_turn}", position = (0*block_size, 4*block_size))
     text_to_screen(bar_surf, text = f"Player Gold: ${player_gold}", position = (0*block_size, 5*block_size))
-    main_screen.blit(bar_surf, (0, 44*block_size))
+    return bar_surf
 
 def render_names_at_mouse_location(
     screen: pygame.display, x: int, y: int, engine: Engine
@@ -92,7 +106,7 @@ def render_names_at_mouse_location(
     )
     name_bar = pygame.Surface((30*block_size, block_size))
     text_to_screen(name_bar, text = names_at_mouse_location, position = (0*block_size, 0*block_size))
-    screen.blit(name_bar, ((x*block_size, y*block_size)))
+    presentation.mark_dirty(screen.blit(name_bar, ((x*block_size, y*block_size))))
 
 def render_names_at_target_location(
     screen: pygame.display, x: int, y: int, engine: Engine
@@ -103,17 +117,39 @@ def render_names_at_target_location(
     )
     name_bar = pygame.Surface((30*block_size, block_size))
     text_to_screen(name_bar, text = names_at_target_location, position = (0*block_size, 0*block_size))
-    screen.blit(name_bar, ((x*block_size, y*block_size)))
+    presentation.mark_dirty(screen.blit(name_bar, ((x*block_size, y*block_size))))
 
 def to_pixel(block_num):
     return block_num * block_size
 
-def draw_entity(screen, entity):
-    try:
-        image = pygame.image.load(entity.graphic)
-    except Exception:
-        traceback.print_exc()
-        print(entity.name)
-        image = pygame.image.load(os.path.join('Dawnlike', 'Characters', 'Player1.png'))
-    pos = entity.graphic_pos
-    screen.blit(image, (to_pixel(entity.x), to_pixel(entity.y)), (pos[0], pos[1], block_size, block_size))
+def draw_entity(screen, entity) -> pygame.Rect:
+    return screen.blit(entity.sprite.surface, (to_pixel(entity.x), to_pixel(entity.y)))
+
+class Renderer:
+    """
+    Draws the game screen for an Engine.
+
+    This base renderer draws nothing, so an engine can run turns with no display.
+    """
+
+    def render(self, engine: Engine, screen: pygame.Surface) -> None:
+        pass
+
+class PygameRenderer(Renderer):
+    """Draws the map, message log, status bar and mouse-over names with pygame."""
+
+    def __init__(self):
+        self.last_game_map = None
+
+    def render(self, engine: Engine, screen: pygame.Surface) -> None:
+        if engine.game_map is not self.last_game_map:
+            # The window still shows the previous floor, only changed cells would be presented.
+            presentation.mark_all_dirty()
+            self.last_game_map = engine.game_map
+        engine.game_map.render(screen)
+
+        engine.message_log.render_messages(screen = screen, x = 40, y = 44, width = 40, height = 5, messages = engine.message_log.messages)
+
+        render_bar(main_screen = screen, engine = engine)
+
+        render_names_at_mouse_location(screen = screen, x = 25, y = constants['screen_height'] - constants['message_height'] - 1, engine = engine)
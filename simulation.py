@@ -0,0 +1,79 @@
+"""
+Run the game with no window.
+
+Used for batch simulation, benchmarking and runs on machines with no display.  Nothing
+here loads images or opens a display, the engine's Renderer draws nothing.
+"""
+from __future__ import annotations
+
+from typing import Callable, Optional, TYPE_CHECKING
+
+import colors
+import exceptions
+from engine import Engine
+from game_map import GameWorld
+from loader_functions.initialize_new_game import get_constants
+from loader_functions.player_init import get_player
+from render_functions import Renderer
+
+if TYPE_CHECKING:
+    from actions import Action
+
+constants = get_constants()
+
+def new_headless_game(class_race: str = 'Human Fighter', dungeon_level: int = 1, seed: Optional[int] = None) -> Engine:
+    """
+    Return an Engine for a new player on a freshly generated floor, with no renderer.
+
+    Runs with the same seed get the same floors.
+    """
+    player = get_player(class_race)
+    engine = Engine(player = player, renderer = Renderer())
+    engine.game_world = GameWorld(
+        engine = engine,
+        map_width = constants['map_width'],
+        map_height = constants['map_height'],
+        max_rooms = constants['max_rooms'],
+        room_min_size = constants['room_min_size'],
+        room_max_size = constants['room_max_size'],
+        current_floor = dungeon_level,
+        seed = seed,
+    )
+    engine.game_map = engine.game_world.build_floor(dungeon_level)
+    engine.game_world.prepare_next_floor()
+    engine.update_fov()
+    return engine
+
+def perform_turn(engine: Engine, action: Action) -> bool:
+    """
+    Perform action, then the monsters' turns, the way EventHandler.handle_action does.
+
+    Returns False if the action was impossible, in which case the monsters don't act.
+    """
+    try:
+        action.perform()
+    except exceptions.Impossible as exc:
+        engine.message_log.add_message(exc.args[0], colors.impossible)
+        return False
+
+    engine.handle_enemy_turns()
+    engine.update_fov()
+    return True
+
+def run(engine: Engine, choose_action: Callable[[Engine], Optional[Action]], max_turns: int) -> int:
+    """
+    Play up to max_turns player actions chosen by choose_action.
+
+    Stops early when the player dies or choose_action returns None.  Returns the number of
+    actions that advanced a turn.
+    """
+    turns = 0
+    for _ in range(max_turns):
+        if not engine.player.is_alive:
+            break
+        action = choose_action(engine)
+        if action is None:
+            break
+        if perform_turn(engine, action):
+            turns += 1
+    return turns
@@ -0,0 +1,68 @@
+from typing import Dict, Tuple
+import os
+import traceback
+
+import pygame
+
+from loader_functions.initialize_new_game import get_constants
+
+constants = get_constants()
+block_size = constants['block_size']
+
+# Sheet drawn in place of any graphic that fails to load.
+fallback_graphic = os.path.join('Dawnlike', 'Characters', 'Player1.png')
+
+_sheets: Dict[str, pygame.Surface] = {}
+_sprites: Dict[Tuple[str, Tuple[int, int]], "SpriteHandle"] = {}
+
+def get_sheet(graphic: str) -> pygame.Surface:
+    """Return a Dawnlike sheet, loaded once and converted to the display format."""
+    sheet = _sheets.get(graphic)
+    if sheet is None:
+        try:
+            sheet = pygame.image.load(graphic).convert_alpha()
+        except Exception:
+            traceback.print_exc()
+            print(graphic)
+            sheet = get_sheet(fallback_graphic)
+        _sheets[graphic] = sheet
+    return sheet
+
+class SpriteHandle:
+    """
+    One block_size square of a sprite sheet.
+
+    Handles are shared by every entity using the same graphic and position.  The image
+    is only cut from its sheet on first use, since converting needs a display.
+    """
+
+    def __init__(self, graphic: str, graphic_pos: Tuple[int, int]):
+        self.graphic = graphic
+        self.graphic_pos = graphic_pos
+        self._surface = None
+
+    @property
+    def surface(self) -> pygame.Surface:
+        if self._surface is None:
+            sheet = get_sheet(self.graphic)
+            area = pygame.Rect(self.graphic_pos, (block_size, block_size)).clip(sheet.get_rect())
+            self._surface = sheet.subsurface(area)
+        return self._surface
+
+    def __reduce__(self):
+        # Pickle as a registry lookup, the surface is rebuilt when next drawn.
+        return (get_sprite, (self.graphic, self.graphic_pos))
+
+    def __copy__(self) -> "SpriteHandle":
+        return self
+
+    def __deepcopy__(self, memo) -> "SpriteHandle":
+        return self
+
+def get_sprite(graphic: str, graphic_pos: Tuple[int, int] = (0, 0)) -> SpriteHandle:
+    """Return the shared handle for the sprite at graphic_pos in the graphic sheet."""
+    key = (graphic, tuple(graphic_pos))
+    sprite = _sprites.get(key)
+    if sprite is None:
+        sprite = _sprites[key] = SpriteHandle(*key)
+    return sprite
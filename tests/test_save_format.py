@@ -0,0 +1,88 @@
+"""
+Round trips through the binary save format.
+
+Run with python -m pytest from the repository root.
+"""
+import io
+import struct
+
+import pytest
+
+import entity_factories
+from loader_functions.save_format import (
+    MAGIC, MESSAGE_CHUNK, RECENT_MESSAGES, SCHEMA_VERSION, SaveReader, SaveWriter, read_container, write_container,
+)
+from render_functions import Renderer
+from simulation import new_headless_game
+
+def round_trip(engine):
+    buffer = io.BytesIO()
+    write_container(buffer, SaveWriter(engine).write())
+    buffer.seek(0)
+    return SaveReader(read_container(buffer)).load_engine(Renderer())
+
+def actor_states(game_map):
+    """Name, position, carried items and buffs of each actor on game_map."""
+    return sorted(
+        (
+            actor.name, actor.x, actor.y,
+            [item.name for item in actor.inventory.items],
+            sorted((buff, list(value)) for buff, value in actor.battler.current_buffs.items()),
+        )
+        for actor in game_map.actors
+    )
+
+def make_game():
+    """A game on floor 2 with floor 1 stored, a potion and a buff on the player and archived messages."""
+    engine = new_headless_game(seed = 1234)
+    engine.game_world.change_floor(2, 1)
+
+    potion = entity_factories.cure_light_wounds_potion.clone()
+    potion.parent = engine.player.inventory
+    engine.player.inventory.items.append(potion)
+    engine.player.battler.current_buffs["Bless"] = [engine.current_turn + 50, 0]
+    engine.timed_effects.schedule(engine.player, "Bless")
+
+    for i in range(MESSAGE_CHUNK + RECENT_MESSAGES + 5):
+        engine.message_log.add_message(f"Message {i}")
+    return engine
+
+def check_same(engine, loaded, stored_floor):
+    assert loaded.game_map.dungeon_level == 2
+    assert (loaded.player.x, loaded.player.y) == (engine.player.x, engine.player.y)
+    assert actor_states(loaded.game_map) == actor_states(engine.game_map)
+    assert [item.name for item in loaded.player.inventory.items] == [item.name for item in engine.player.inventory.items]
+    assert loaded.player.battler.current_buffs == engine.player.battler.current_buffs
+    assert any(entry[2] is loaded.player and entry[3] == "Bless" for entry in loaded.timed_effects.heap)
+    assert (loaded.game_map.tiles == engine.game_map.tiles).all()
+
+    loaded.message_log.load_history()
+    assert [m.plain_text for m in loaded.message_log.messages] == [m.plain_text for m in engine.message_log.messages]
+
+    assert actor_states(loaded.game_world.load_floor(1)) == stored_floor
+
+def test_round_trip():
+    engine = make_game()
+    stored_floor = actor_states(engine.game_world.floors[1])
+    check_same(engine, round_trip(engine), stored_floor)
+
+def test_round_trip_of_a_loaded_save():
+    engine = make_game()
+    stored_floor = actor_states(engine.game_world.floors[1])
+    # Written again before its stored floor and older messages are loaded, from the sections as read.
+    loaded = round_trip(round_trip(engine))
+    check_same(engine, loaded, stored_floor)
+
+def test_rejects_bad_magic():
+    with pytest.raises(ValueError):
+        read_container(io.BytesIO(b"NOTASAVE" + struct.pack("<HI", SCHEMA_VERSION, 0)))
+
+def test_rejects_other_schema_version():
+    with pytest.raises(ValueError):
+        read_container(io.BytesIO(MAGIC + struct.pack("<HI", SCHEMA_VERSION - 1, 0)))
+
+def test_rejects_truncated_save():
+    buffer = io.BytesIO()
+    write_container(buffer, SaveWriter(make_game()).write())
+    with pytest.raises(ValueError):
+        read_container(io.BytesIO(buffer.getvalue()[:-10]))
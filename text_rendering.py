@@ -0,0 +1,19 @@
+from typing import Tuple
+import functools
+
+import pygame
+
+import colors
+
+@functools.lru_cache(maxsize = None)
+def get_font(font: str = 'arial', size: int = 16) -> pygame.font.Font:
+    """Return the system font for (font, size), looked up and opened only once."""
+    return pygame.font.SysFont(font, size)
+
+@functools.lru_cache(maxsize = 1024)
+def render_line(text: str, color: Tuple[int, int, int], size: int = 16, font: str = 'arial') -> pygame.Surface:
+    """Return a rendered line of text.  Recently used lines are served from the cache."""
+    return get_font(font, size).render(text, True, color)
+
+def text_to_screen(screen, text = '', color = colors.white, size = 16, position = (0, 0), font = 'arial'):
+    screen.blit(render_line(text, tuple(color), size, font), position)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+import heapq
+
+if TYPE_CHECKING:
+    from entity import Actor
+    from game_map import GameMap
+
+class TimedEffects:
+    """
+    Expiry times of buffs and summons, kept in a heap ordered by expiry turn.
+
+    A buff is scheduled whenever it is put in an actor's battler.current_buffs.  Entries
+    are not removed when a buff is refreshed or its actor dies or leaves the floor, they
+    are checked against the actor when popped and dropped if they no longer match.  A buff
+    already on the heap for the same turn isn't pushed again.
+    """
+
+    def __init__(self):
+        self.heap: List[Tuple[int, int, Actor, str]] = []
+        self.count = 0 # Tie breaker so entries with the same turn never compare actors
+        # (id(actor), buff, turn) of the entries on the heap, which keep their actors alive.
+        self.scheduled: Set[Tuple[int, str, int]] = set()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["scheduled"] # Ids don't survive pickling, rebuilt from the heap
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.scheduled = {(id(actor), buff, turn) for turn, _, actor, buff in self.heap}
+
+    def schedule(self, actor: Actor, buff: str) -> None:
+        """Schedule actor's buff to expire at the turn stored in its current_buffs."""
+        turn = actor.battler.current_buffs[buff][0]
+        if (id(actor), buff, turn) in self.scheduled:
+            return
+        self.scheduled.add((id(actor), buff, turn))
+        self.count += 1
+        heapq.heappush(self.heap, (turn, self.count, actor, buff))
+
+    def pop(self) -> Tuple[int, int, Actor, str]:
+        turn, count, actor, buff = heapq.heappop(self.heap)
+        self.scheduled.discard((id(actor), buff, turn))
+        return turn, count, actor, buff
+
+    def schedule_actors(self, actors: Iterable[Actor]) -> None:
+        """Schedule every buff the actors have that isn't already, used when a stored floor becomes current."""
+        for actor in actors:
+            for buff in actor.battler.current_buffs:
+                self.schedule(actor, buff)
+
+    def is_current(self, entry: Tuple[int, int, Actor, str], game_map: GameMap) -> bool:
+        """Return True if the entry still matches a buff on a live actor on game_map."""
+        turn, _, actor, buff = entry
+        current_buffs = actor.battler.current_buffs
+        return (
+            actor.__dict__.get("parent") is game_map and actor.is_alive
+            and buff in current_buffs and current_buffs[buff][0] == turn
+        )
+
+    def pop_due(self, current_turn: int, game_map: GameMap) -> List[Tuple[Actor, str]]:
+        """Pop the (actor, buff) pairs on game_map whose expiry turn has passed."""
+        due = []
+        while self.heap and self.heap[0][0] < current_turn:
+            entry = self.pop()
+            if self.is_current(entry, game_map):
+                due.append((entry[2], entry[3]))
+        return due
+
+    def next_expiry(self, game_map: GameMap) -> Optional[int]:
+        """Return the earliest expiry turn of a buff on game_map, None if there is none."""
+        while self.heap and not self.is_current(self.heap[0], game_map):
+            self.pop()
+        return self.heap[0][0] if self.heap else None